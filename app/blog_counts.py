@@ -0,0 +1,80 @@
+import asyncio
+from collections import Counter
+from typing import Iterable, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Blog, Category, Tag, blog_tag
+from app.versions import bump_versions
+
+_categories = Category.__table__
+_tags = Tag.__table__
+
+
+async def _apply(db: AsyncSession, table, deltas: Counter) -> None:
+    # Ascending id order, so concurrent writers lock counter rows in the same order
+    params = [{"row_id": row_id, "delta": delta} for row_id, delta in sorted(deltas.items()) if delta]
+    if params:
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(blog_count=table.c.blog_count + bindparam("delta")),
+            params,
+        )
+
+
+async def count_blogs(db: AsyncSession, blogs: Iterable[Tuple[int, Iterable[int]]], sign: int = 1) -> None:
+    """Add blogs, given as (category_id, tag_ids), to the category and tag counters
+
+    Pass sign=-1 when removing them. Runs in the caller's transaction, so the
+    counters commit or roll back together with the blog rows.
+    """
+    category_deltas, tag_deltas = Counter(), Counter()
+    for category_id, tag_ids in blogs:
+        category_deltas[category_id] += sign
+        for tag_id in set(tag_ids):
+            tag_deltas[tag_id] += sign
+    await _apply(db, _categories, category_deltas)
+    await _apply(db, _tags, tag_deltas)
+
+
+async def reconcile_blog_counts(db: AsyncSession) -> dict:
+    """Recompute every counter that drifted from the blogs table; returns rows repaired"""
+    category_actual = (
+        select(func.count()).select_from(Blog.__table__)
+        .where(Blog.__table__.c.category_id == _categories.c.id)
+        .scalar_subquery()
+    )
+    tag_actual = (
+        select(func.count()).select_from(blog_tag)
+        .where(blog_tag.c.tag_id == _tags.c.id)
+        .scalar_subquery()
+    )
+    categories = await db.execute(
+        update(_categories).where(_categories.c.blog_count != category_actual).values(blog_count=category_actual)
+    )
+    tags = await db.execute(
+        update(_tags).where(_tags.c.blog_count != tag_actual).values(blog_count=tag_actual)
+    )
+    repaired = {"categories": categories.rowcount, "tags": tags.rowcount}
+    if repaired["categories"]:
+        await bump_versions(db, "categories")
+    if repaired["tags"]:
+        await bump_versions(db, "tags")
+    return repaired
+
+
+async def main() -> None:
+    from app.database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as db:
+        repaired = await reconcile_blog_counts(db)
+        await db.commit()
+    await async_engine.dispose()
+    print(f"Repaired blog counts: {repaired['categories']} categories, {repaired['tags']} tags")
+
+
+# python -m app.blog_counts
+if __name__ == "__main__":
+    asyncio.run(main())
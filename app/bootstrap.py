@@ -0,0 +1,78 @@
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.database import DATABASE_URL, AsyncSessionLocal, Base, async_engine, dialect_insert, replicas
+from app.hashing import password_hasher
+from app.jobs import job_runner
+from app.models import User, UserRole
+
+
+async def create_schema() -> None:
+    """Create missing tables (skip when the schema is managed by migrations)"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed_admin() -> None:
+    """Create the configured admin user unless it already exists"""
+    async with AsyncSessionLocal() as db:
+        if await db.scalar(select(User.id).where(User.email == settings.ADMIN_EMAIL)):
+            print(f"Admin user already exists: {settings.ADMIN_EMAIL}")
+            return
+
+        # Several workers may start at once: a conflict on the unique email
+        # means another one created the admin first
+        stmt = dialect_insert(db)(User).values(
+            email=settings.ADMIN_EMAIL,
+            hashed_password=await password_hasher.hash(settings.ADMIN_PASSWORD),
+            full_name="System Administrator",
+            role=UserRole.ADMIN,
+            is_active=True,
+            token_version=0,
+        )
+        created = await db.scalar(
+            stmt.on_conflict_do_nothing(index_elements=["email"]).returning(User.id)
+        )
+        await db.commit()
+        if created:
+            print(f"Admin user created: {settings.ADMIN_EMAIL}")
+        else:
+            print(f"Admin user already exists: {settings.ADMIN_EMAIL}")
+
+
+async def _timed(timings: dict, name: str, step) -> None:
+    started = time.perf_counter()
+    await step()
+    timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup tasks once per worker, before it accepts requests"""
+    print("RUNNING IN DOCKER:", os.getenv("DOCKER"))
+    print("USING DATABASE URL:", make_url(DATABASE_URL).render_as_string(hide_password=True))
+
+    timings = {}
+    started = time.perf_counter()
+    if settings.CREATE_SCHEMA_ON_STARTUP:
+        await _timed(timings, "create_schema_ms", create_schema)
+    if settings.SEED_ADMIN_ON_STARTUP:
+        await _timed(timings, "seed_admin_ms", seed_admin)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    app.state.startup_timings = timings
+    print("Startup completed:", timings)
+    job_runner.start()
+
+    yield
+
+    await job_runner.stop()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    for replica in replicas.engines:
+        await replica.dispose()
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,14 +6,83 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    # Used refresh tokens are kept this long so that replaying one still revokes its
+    # family; after that (or once expired) the rows are pruned
+    REFRESH_TOKEN_REUSE_WINDOW_HOURS: int = 24
+
+    # Authenticated principal cache (0 disables it)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    # Stateless verification: trust uid/role claims, check only token_version
+    STATELESS_AUTH: bool = False
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 300
+    TOKEN_VERSION_CACHE_MAX_SIZE: int = 100000
+
+    # Seconds /admin/dashboard statistics are served from memory (0 disables it)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 10
+
+    # Seconds a worker trusts its cached category/tag maps before re-reading their version rows
+    REFERENCE_DATA_CHECK_SECONDS: float = 5
+
+    # Background jobs: concurrent jobs per worker process (0 only queues them) and rows per chunk
+    JOB_WORKERS: int = 2
+    JOB_CHUNK_SIZE: int = 500
+    # Seconds an idle job worker waits before looking for new jobs queued by other processes
+    JOB_POLL_SECONDS: float = 2
+    # Pause between chunks, leaving the connection pool to request handlers
+    JOB_CHUNK_PAUSE_SECONDS: float = 0.01
+    # A running job without a heartbeat for this long is resumed by another worker
+    JOB_STALE_SECONDS: int = 120
+
+    # Password hashing (any passlib scheme); legacy SHA-256 hashes are upgraded on login
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    # Size of the hashing process pool (0 runs hashes on the default thread pool)
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hash requests queued or running before new ones get a 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Sliding-window limits on /auth/login and /auth/register, per client IP and per email
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 30
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 10
+    REGISTER_RATE_LIMIT_PER_IP: int = 10
+    REGISTER_RATE_LIMIT_PER_EMAIL: int = 3
+    # Keys tracked in memory before the least recently used are evicted
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Share counters between workers through Redis (requires the redis package)
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
     
     # Database
     DATABASE_URL: str
     DOCKER_URL: str
+    # Derived from the active URL (asyncpg / aiosqlite) when not set
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool, applied to each engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Seconds after which a connection is replaced (-1 never)
+    DB_POOL_RECYCLE: int = 1800
+
+    # Comma-separated read replica URLs; read-only routes round-robin across them
+    READ_REPLICA_URLS: str = ""
+    # Seconds a replica that failed to connect is skipped in favour of the primary
+    READ_REPLICA_RETRY_SECONDS: int = 30
+    # Seconds a user's reads stay on the primary after their own write (0 disables it)
+    READ_YOUR_WRITES_SECONDS: int = 5
+    READ_YOUR_WRITES_MAX_USERS: int = 100000
     
     # Admin credentials
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
+
+    # Startup tasks; disable where migrations manage the schema and the admin
+    CREATE_SCHEMA_ON_STARTUP: bool = True
+    SEED_ADMIN_ON_STARTUP: bool = True
     
     class Config:
         env_file = ".env"
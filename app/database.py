@@ -1,8 +1,18 @@
 import os
-from sqlalchemy import create_engine
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from app.cache import TTLCache
 from app.config import settings
+from app.metrics import instrument_db_timing
+from app.pool_metrics import TimedAsyncAdaptedQueuePool, instrument_engine
 
 # Decide which DB URL to use
 DATABASE_URL = (
@@ -11,29 +21,149 @@ DATABASE_URL = (
     else settings.DATABASE_URL
 )
 
-print("RUNNING IN DOCKER:", os.getenv("DOCKER"))
-print("USING DATABASE URL:", DATABASE_URL)
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
+def _async_url(url: str) -> str:
+    """Swap the sync driver of a database URL for its asyncio counterpart"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or _async_url(DATABASE_URL)
+
+def _pool_options(url: str, poolclass, name: str) -> dict:
+    """Pool sizing from settings; in-memory SQLite keeps its single-connection pool"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_logging_name": name,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+# Async engine and session factory used by the API routes
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
     pool_pre_ping=True,
+    **_pool_options(ASYNC_DATABASE_URL, TimedAsyncAdaptedQueuePool, "primary"),
 )
+instrument_engine(async_engine.sync_engine, "primary")
+instrument_db_timing(async_engine.sync_engine)
+
+# expire_on_commit=False: attributes cannot lazy-load on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+class ReplicaSet:
+    """Round-robin over read replica engines, skipping ones that recently failed"""
+
+    def __init__(self, engines: List):
+        self.engines = engines
+        self._next = 0
+        self._down_until: Dict[int, float] = {}
+
+    def candidates(self) -> List:
+        """Healthy replicas, starting with the next one in turn"""
+        if not self.engines:
+            return []
+        start = self._next
+        self._next = (start + 1) % len(self.engines)
+        now = time.monotonic()
+        ordered = self.engines[start:] + self.engines[:start]
+        return [engine for engine in ordered if self._down_until.get(id(engine), 0) <= now]
+
+    def mark_down(self, engine) -> None:
+        self._down_until[id(engine)] = time.monotonic() + settings.READ_REPLICA_RETRY_SECONDS
 
-# Session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
+
+def _create_replica(index: int, url: str):
+    url = _async_url(url)
+    name = f"replica-{index}"
+    replica = create_async_engine(
+        url,
+        pool_pre_ping=True,
+        **_pool_options(url, TimedAsyncAdaptedQueuePool, name),
+    )
+    instrument_engine(replica.sync_engine, name)
+    instrument_db_timing(replica.sync_engine)
+    return replica
+
+
+replicas = ReplicaSet([
+    _create_replica(index, url.strip())
+    for index, url in enumerate(settings.READ_REPLICA_URLS.split(","))
+    if url.strip()
+])
+
+ReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
     autoflush=False,
-    bind=engine
+    expire_on_commit=False,
 )
 
+# Ids of users who committed a write recently; their reads stay on the primary
+recent_writers = TTLCache(
+    max_size=settings.READ_YOUR_WRITES_MAX_USERS,
+    ttl_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    # Set by the auth dependencies on the request's primary session
+    user_id = session.info.get("user_id")
+    if user_id is not None and replicas.engines:
+        recent_writers.set(user_id, True)
+
+
+@asynccontextmanager
+async def read_session(user_id: Optional[int] = None):
+    """Session on a healthy read replica, or on the primary when none is usable"""
+    session = None
+    if replicas.engines and (user_id is None or recent_writers.get(user_id) is None):
+        for replica in replicas.candidates():
+            candidate = ReadSessionLocal(bind=replica)
+            try:
+                # Check out (and pre-ping) a connection now so a dead replica can be skipped
+                await candidate.connection()
+            except (DBAPIError, OSError):
+                await candidate.close()
+                replicas.mark_down(replica)
+                continue
+            session = candidate
+            break
+    if session is None:
+        session = AsyncSessionLocal()
+    async with session:
+        yield session
+
+
 # Base class for models
 Base = declarative_base()
 
-# Dependency for FastAPI
-def get_db():
-    db = SessionLocal()
-    try:
+# Async dependency for FastAPI
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Postgres and SQLite (3.35+) share the ON CONFLICT / RETURNING syntax
+def dialect_insert(db):
+    """INSERT construct of the session's dialect, for ON CONFLICT support"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config import settings
+
+# Unsalted SHA-256 hex digests are the legacy format; they still verify but
+# are flagged deprecated so verify_and_update() returns a replacement hash
+pwd_context = CryptContext(
+    schemes=[settings.PASSWORD_HASH_SCHEME, "hex_sha256"],
+    deprecated=["hex_sha256"],
+)
+
+# Verified against when a login names no account, so that an unknown email
+# costs the same hashing work as a wrong password
+DUMMY_HASH = pwd_context.hash("dummy-password")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(password, hashed_password)
+    except ValueError:
+        # Unrecognized hash format
+        return False, None
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash uses a deprecated (or unrecognized) scheme"""
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except ValueError:
+        return True
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded process pool with admission control"""
+
+    def __init__(self, workers: int, max_pending: int, latency_samples: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._latencies = deque(maxlen=latency_samples)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        # 0 workers: use the default thread pool instead of a process pool
+        if self.workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor(), func, *args)
+        finally:
+            self.pending -= 1
+            self._latencies.append(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured scheme"""
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one is outdated"""
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        """Queue depth, rejections and latency percentiles in milliseconds"""
+        samples = sorted(self._latencies)
+
+        def percentile(q: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[int(q * (len(samples) - 1))] * 1000, 2)
+
+        return {
+            "scheme": settings.PASSWORD_HASH_SCHEME,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "samples": len(samples),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
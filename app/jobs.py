@@ -0,0 +1,360 @@
+import asyncio
+import os
+import socket
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy import and_, delete, func, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.blog_counts import count_blogs
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.hashing import needs_rehash
+from app.reference_data import reference_data
+from app.models import Blog, Category, Job, JobStatus, RefreshToken, User, UserRole, blog_tag
+from app.user_role import invalidate_user, stale_refresh_tokens
+from app.versions import bump_versions
+
+# Long-running admin operations are stored as rows in the jobs table and run
+# by a few asyncio workers per process, one chunk of at most JOB_CHUNK_SIZE
+# rows per transaction. Each chunk commits its work together with the job's
+# new checkpoint and progress, so a job interrupted anywhere (cancelled,
+# worker restarted, process killed) resumes after its last committed chunk
+# and never applies a chunk twice. Request handlers only insert or read job
+# rows, so their latency does not depend on how big a job is.
+
+
+class Chunk(NamedTuple):
+    """Outcome of one step of a job"""
+    processed: int
+    # Where the next step starts; None once the job is complete
+    checkpoint: Optional[dict]
+    # Runs after the chunk committed (cache invalidation)
+    on_commit: Optional[Callable[[], None]] = None
+
+
+class JobKind(NamedTuple):
+    # Rows the job is expected to process, for progress reporting
+    count: Callable[[AsyncSession, dict], Awaitable[int]]
+    # Process the next chunk of at most `limit` rows after `checkpoint`
+    step: Callable[[AsyncSession, dict, dict, int], Awaitable[Chunk]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---- deactivate_users ----
+
+def _deactivation_filter(params: dict) -> list:
+    # Admins are never deactivated in bulk, which also protects the requester
+    conditions = [User.is_active.is_(True), User.role != UserRole.ADMIN]
+    if params.get("user_ids"):
+        conditions.append(User.id.in_(params["user_ids"]))
+    if params.get("email_domain"):
+        # autoescape: "%" and "_" in the domain are literal characters, not wildcards
+        domain = "@" + params["email_domain"].lower()
+        conditions.append(func.lower(User.email).endswith(domain, autoescape=True))
+    return conditions
+
+
+async def _count_deactivations(db: AsyncSession, params: dict) -> int:
+    return await db.scalar(select(func.count()).select_from(User).where(*_deactivation_filter(params)))
+
+
+async def _deactivate_users(db: AsyncSession, params: dict, checkpoint: dict, limit: int) -> Chunk:
+    rows = (await db.execute(
+        select(User.id, User.email)
+        .where(User.id > checkpoint.get("last_id", 0), *_deactivation_filter(params))
+        .order_by(User.id)
+        .limit(limit)
+    )).all()
+    if not rows:
+        return Chunk(0, None)
+    # Same effect as DELETE /users/{id}: deactivate and revoke every token
+    await db.execute(
+        update(User)
+        .where(User.id.in_([row.id for row in rows]))
+        .values(is_active=False, token_version=User.token_version + 1)
+    )
+
+    def invalidate():
+        for row in rows:
+            invalidate_user(row.email, row.id)
+
+    return Chunk(len(rows), {"last_id": rows[-1].id}, invalidate)
+
+
+# ---- delete_category ----
+
+async def _count_category_blogs(db: AsyncSession, params: dict) -> int:
+    return await db.scalar(select(Category.blog_count).where(Category.id == params["category_id"])) or 0
+
+
+async def _delete_category(db: AsyncSession, params: dict, checkpoint: dict, limit: int) -> Chunk:
+    category_id = params["category_id"]
+    blog_ids = (await db.scalars(
+        select(Blog.id).where(Blog.category_id == category_id).order_by(Blog.id).limit(limit)
+    )).all()
+    if not blog_ids:
+        # Every blog is gone; the category itself goes in the final chunk
+        await db.execute(delete(Category.__table__).where(Category.id == category_id))
+        await bump_versions(db, "categories", "blogs")
+        return Chunk(0, None, reference_data.expire)
+
+    tag_ids = defaultdict(list)
+    for blog_id, tag_id in await db.execute(
+        select(blog_tag.c.blog_id, blog_tag.c.tag_id).where(blog_tag.c.blog_id.in_(blog_ids))
+    ):
+        tag_ids[blog_id].append(tag_id)
+    await db.execute(delete(blog_tag).where(blog_tag.c.blog_id.in_(blog_ids)))
+    await db.execute(delete(Blog.__table__).where(Blog.id.in_(blog_ids)))
+    await count_blogs(db, [(category_id, tag_ids[blog_id]) for blog_id in blog_ids], sign=-1)
+    await bump_versions(db, "blogs")
+    return Chunk(len(blog_ids), {"last_id": blog_ids[-1]})
+
+
+# ---- rehash_passwords ----
+
+async def _count_users(db: AsyncSession, params: dict) -> int:
+    return await db.scalar(select(func.count()).select_from(User))
+
+
+async def _rehash_passwords(db: AsyncSession, params: dict, checkpoint: dict, limit: int) -> Chunk:
+    # Hashes can only be recomputed from the plaintext, which exists at login
+    # (where verify_and_update() upgrades them). Users whose stored hash is
+    # outdated are signed out instead, so their next login re-hashes it.
+    rows = (await db.execute(
+        select(User.id, User.email, User.hashed_password)
+        .where(User.id > checkpoint.get("last_id", 0))
+        .order_by(User.id)
+        .limit(limit)
+    )).all()
+    if not rows:
+        return Chunk(0, None)
+    outdated = [row for row in rows if needs_rehash(row.hashed_password)]
+    if outdated:
+        await db.execute(
+            update(User)
+            .where(User.id.in_([row.id for row in outdated]))
+            .values(token_version=User.token_version + 1)
+        )
+
+    def invalidate():
+        for row in outdated:
+            invalidate_user(row.email, row.id)
+
+    signed_out = checkpoint.get("signed_out", 0) + len(outdated)
+    return Chunk(len(rows), {"last_id": rows[-1].id, "signed_out": signed_out}, invalidate)
+
+
+# ---- prune_refresh_tokens ----
+
+async def _count_stale_refresh_tokens(db: AsyncSession, params: dict) -> int:
+    return await db.scalar(select(func.count()).select_from(RefreshToken).where(stale_refresh_tokens()))
+
+
+async def _prune_refresh_tokens(db: AsyncSession, params: dict, checkpoint: dict, limit: int) -> Chunk:
+    # Login and refresh prune their own user/family; this sweeps users who never come back
+    token_ids = (await db.scalars(
+        select(RefreshToken.id)
+        .where(RefreshToken.id > checkpoint.get("last_id", 0), stale_refresh_tokens())
+        .order_by(RefreshToken.id)
+        .limit(limit)
+    )).all()
+    if not token_ids:
+        return Chunk(0, None)
+    await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(token_ids)))
+    return Chunk(len(token_ids), {"last_id": token_ids[-1]})
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    "deactivate_users": JobKind(_count_deactivations, _deactivate_users),
+    "delete_category": JobKind(_count_category_blogs, _delete_category),
+    "rehash_passwords": JobKind(_count_users, _rehash_passwords),
+    "prune_refresh_tokens": JobKind(_count_stale_refresh_tokens, _prune_refresh_tokens),
+}
+
+
+class JobRunner:
+    """Bounded pool of in-process workers that claim queued jobs and run them chunk by chunk"""
+
+    def __init__(self, workers: int, chunk_size: int, poll_seconds: float,
+                 pause_seconds: float, stale_seconds: int):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_seconds = poll_seconds
+        self.pause_seconds = pause_seconds
+        self.stale_seconds = stale_seconds
+        # Identifies this process in jobs.locked_by
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.running = set()
+        self.chunks = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers and hand this process's jobs back to the queue"""
+        interrupted = list(self.running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if interrupted:
+            # The interrupted chunks rolled back; any worker resumes from the last checkpoint
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id.in_(interrupted), Job.locked_by == self.owner, Job.status == JobStatus.RUNNING)
+                    .values(status=JobStatus.QUEUED, locked_by=None)
+                )
+                await db.commit()
+
+    def notify(self) -> None:
+        """Wake an idle worker of this process after a job was queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job_id = await self._claim()
+            except Exception as exc:
+                print(f"Job runner could not claim a job: {exc!r}")
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            self.running.add(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as exc:
+                # Lost the database mid-job: the job stays running and is taken over once stale
+                print(f"Job {job_id} interrupted: {exc!r}")
+            finally:
+                self.running.discard(job_id)
+
+    def _claimable(self):
+        stale = _utcnow() - timedelta(seconds=self.stale_seconds)
+        return or_(
+            Job.status == JobStatus.QUEUED,
+            and_(Job.status == JobStatus.RUNNING, Job.heartbeat_at < stale),
+        )
+
+    async def _claim(self) -> Optional[int]:
+        """Take the oldest queued (or abandoned) job; None if there is none or another worker won"""
+        async with AsyncSessionLocal() as db:
+            stmt = select(Job.id).where(self._claimable())
+            if self.running:
+                # A chunk slower than JOB_STALE_SECONDS must not be taken over by this process itself
+                stmt = stmt.where(Job.id.notin_(self.running))
+            job_id = await db.scalar(stmt.order_by(Job.id).limit(1))
+            if job_id is None:
+                return None
+            now = _utcnow()
+            # The condition is re-checked by the UPDATE, so only one worker claims the job
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, self._claimable())
+                .values(
+                    status=JobStatus.RUNNING,
+                    locked_by=self.owner,
+                    heartbeat_at=now,
+                    started_at=func.coalesce(Job.started_at, literal(now, Job.started_at.type)),
+                )
+            )
+            await db.commit()
+            return job_id if result.rowcount == 1 else None
+
+    def _owned(self, job_id: int):
+        return and_(Job.id == job_id, Job.locked_by == self.owner, Job.status == JobStatus.RUNNING)
+
+    async def _run(self, job_id: int) -> None:
+        while True:
+            async with AsyncSessionLocal() as db:
+                job = (await db.execute(
+                    select(Job.kind, Job.params, Job.checkpoint, Job.total, Job.cancel_requested)
+                    .where(self._owned(job_id))
+                )).one_or_none()
+                if job is None:
+                    # Cancelled while queued, or taken over after we looked stale
+                    return
+
+                now = _utcnow()
+                if job.cancel_requested:
+                    await db.execute(
+                        update(Job).where(self._owned(job_id))
+                        .values(status=JobStatus.CANCELLED, finished_at=now, locked_by=None)
+                    )
+                    await db.commit()
+                    return
+
+                kind = JOB_KINDS.get(job.kind)
+                values = {"heartbeat_at": now}
+                try:
+                    if kind is None:
+                        raise ValueError(f"Unknown job kind {job.kind!r}")
+                    if job.total is None:
+                        values["total"] = await kind.count(db, job.params)
+                    chunk = await kind.step(db, job.params, job.checkpoint or {}, self.chunk_size)
+                except Exception as exc:
+                    await db.rollback()
+                    self.failures += 1
+                    await db.execute(
+                        update(Job).where(self._owned(job_id))
+                        .values(status=JobStatus.FAILED, error=f"{exc.__class__.__name__}: {exc}",
+                                finished_at=_utcnow(), locked_by=None)
+                    )
+                    await db.commit()
+                    return
+
+                if chunk.checkpoint is None:
+                    values.update(status=JobStatus.SUCCEEDED, finished_at=now, locked_by=None)
+                else:
+                    values["checkpoint"] = chunk.checkpoint
+                result = await db.execute(
+                    update(Job).where(self._owned(job_id))
+                    .values(processed=Job.processed + chunk.processed, **values)
+                )
+                if result.rowcount != 1:
+                    # Another worker took the job over: drop this chunk, it will redo it
+                    await db.rollback()
+                    return
+                await db.commit()
+                self.chunks += 1
+
+            if chunk.on_commit is not None:
+                chunk.on_commit()
+            if chunk.checkpoint is None:
+                return
+            await asyncio.sleep(self.pause_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "owner": self.owner,
+            "workers": self.workers,
+            "running": sorted(self.running),
+            "chunk_size": self.chunk_size,
+            "chunks": self.chunks,
+            "failures": self.failures,
+        }
+
+
+job_runner = JobRunner(
+    workers=settings.JOB_WORKERS,
+    chunk_size=settings.JOB_CHUNK_SIZE,
+    poll_seconds=settings.JOB_POLL_SECONDS,
+    pause_seconds=settings.JOB_CHUNK_PAUSE_SECONDS,
+    stale_seconds=settings.JOB_STALE_SECONDS,
+)
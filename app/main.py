@@ -1,38 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, SessionLocal, Base
-from app.models import User, UserRole
-from app.config import settings
-from app.user_role import hash_password
-from app.routes import auth, users, admin
-
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-
-db = SessionLocal()
-try:
-    existing_admin = db.query(User).filter(User.email == settings.ADMIN_EMAIL).first()
-    if not existing_admin:
-        admin_user = User(
-            email=settings.ADMIN_EMAIL,
-            hashed_password=hash_password(settings.ADMIN_PASSWORD),
-            full_name="System Administrator",
-            role="admin",
-            is_active=True
-        )
-        db.add(admin_user)
-        db.commit()
-        print(f"Admin user created: {settings.ADMIN_EMAIL}")
-    else:
-        print(f"Admin user already exists: {settings.ADMIN_EMAIL}")
-finally:
-    db.close()
+from fastapi.responses import PlainTextResponse
+from app.bootstrap import lifespan
+from app.metrics import MetricsMiddleware, render_metrics
+from app.routes import auth, users, admin, export
 
 
+# Schema creation and admin seeding run in lifespan, not at import
 app = FastAPI(
-    title="My FastAPI Application"
+    title="My FastAPI Application",
+    lifespan=lifespan
 )
 
 
@@ -45,10 +22,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps everything, including CORS preflights
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(admin.router)
+app.include_router(export.router)
 
 
 @app.get("/", tags=["Root"])
@@ -56,3 +37,7 @@ def root():
     return {"status": "API is running",}
 
 
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def metrics():
+    """Request latency, status and DB-time metrics for Prometheus to scrape"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
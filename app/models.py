@@ -7,7 +7,14 @@ from sqlalchemy import (
     Enum as SQLEnum,
     Table,
     ForeignKey,
+    Index,
+    JSON,
+    Text,
+    DDL,
+    event,
+    literal_column,
 )
+from sqlalchemy.dialects.sqlite import DATETIME as SQLiteDateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -16,6 +23,24 @@ from enum import Enum
 
 
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds; bind Python datetimes
+# the same way so keyset/range comparisons against server defaults line up
+Timestamp = DateTime(timezone=True).with_variant(
+    SQLiteDateTime(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+
+class TableVersion(Base):
+    """Change counter per table, bumped in the same transaction as each write"""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     USER = "user"
@@ -27,9 +52,49 @@ blog_tag = Table(
     Base.metadata,
     Column("blog_id", ForeignKey("blogs.id"), primary_key=True),
     Column("tag_id", ForeignKey("tags.id"), primary_key=True),
+    # The primary key covers blog -> tags; this covers tag -> blogs
+    Index("ix_blog_tag_tag_id_blog_id", "tag_id", "blog_id"),
 )
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    """A long-running admin operation, run in chunks by app.jobs"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(
+        SQLEnum(JobStatus, name="job_status", create_constraint=True),
+        default=JobStatus.QUEUED,
+        nullable=False,
+    )
+    # Where the next chunk starts; committed together with each chunk's work
+    checkpoint = Column(JSON, nullable=True)
+    processed = Column(Integer, nullable=False, default=0, server_default="0")
+    total = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default="0")
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Worker running the job and its last sign of life; stale jobs are taken over
+    locked_by = Column(String(255), nullable=True)
+    heartbeat_at = Column(Timestamp, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+    started_at = Column(Timestamp, nullable=True)
+    finished_at = Column(Timestamp, nullable=True)
+
+    # Oldest claimable job first
+    __table_args__ = (Index("ix_jobs_status_id", "status", "id"),)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -43,18 +108,41 @@ class User(Base):
         nullable=False,
     )
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped whenever previously issued tokens must stop working
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
+
+    # Keyset pagination order
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     def __repr__(self):
         return f"<User {self.email}>"
 
 
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # SHA-256 of the token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # Every rotation of one login shares a family; reuse revokes the family
+    family_id = Column(String(32), index=True, nullable=False)
+    # User.token_version at issue time
+    token_version = Column(Integer, nullable=False)
+    expires_at = Column(Timestamp, nullable=False)
+    used_at = Column(Timestamp, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+
 class Category(Base):
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, nullable=False)
+    # Maintained by app.blog_counts in the transactions that add or remove blogs
+    blog_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     blogs = relationship("Blog", back_populates="category")
 
@@ -64,6 +152,8 @@ class Tag(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, nullable=False)
+    # Maintained by app.blog_counts in the transactions that add or remove blogs
+    blog_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     blogs = relationship(
         "Blog",
@@ -71,6 +161,19 @@ class Tag(Base):
         back_populates="tags",
     )
 
+    __table_args__ = (
+        # Top tags by number of blogs
+        Index("ix_tags_blog_count_id", "blog_count", "id"),
+    )
+
+
+def _search_vector(title, author):
+    """Full-text search document of a blog (Postgres)"""
+    return func.to_tsvector(
+        literal_column("'english'::regconfig"),
+        title + literal_column("' '") + author,
+    )
+
 
 class Blog(Base):
     __tablename__ = "blogs"
@@ -88,5 +191,42 @@ class Blog(Base):
         back_populates="blogs",
     )
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pagination order, unfiltered and per category/author
+        Index("ix_blogs_created_at_id", "created_at", "id"),
+        Index("ix_blogs_category_id_created_at_id", "category_id", "created_at", "id"),
+        Index("ix_blogs_author_created_at_id", "author", "created_at", "id"),
+        # Postgres full-text search over title and author
+        Index(
+            "ix_blogs_search",
+            _search_vector(title, author),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# Queries must use this exact expression to be served by ix_blogs_search
+blog_search_vector = _search_vector(Blog.title, Blog.author)
+
+# SQLite fallback: an external-content FTS5 table kept in sync by triggers
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5("
+    "title, author, content='blogs', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blogs_fts_insert AFTER INSERT ON blogs BEGIN "
+    "INSERT INTO blogs_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+    "CREATE TRIGGER IF NOT EXISTS blogs_fts_delete AFTER DELETE ON blogs BEGIN "
+    "INSERT INTO blogs_fts(blogs_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS blogs_fts_update AFTER UPDATE ON blogs BEGIN "
+    "INSERT INTO blogs_fts(blogs_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO blogs_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+):
+    event.listen(Blog.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+# blogs_fts is not in the metadata: drop it with blogs, or a later create_all
+# would keep its stale index (IF NOT EXISTS) over reused rowids
+event.listen(
+    Blog.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS blogs_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the (created_at, id) position of the last row as an opaque cursor"""
+    return _encode([created_at.isoformat(), row_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        created_at, row_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+
+def _keyset(stmt: Select, model, cursor: Optional[str], limit: int) -> Select:
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) > (created_at, row_id))
+    return stmt.order_by(model.created_at, model.id).limit(limit + 1)
+
+
+def _page(rows, limit: int) -> dict:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+async def fetch_page(db: AsyncSession, stmt: Select, model, cursor: Optional[str], limit: int) -> dict:
+    """Run a keyset-paginated query ordered by (created_at, id)"""
+    rows = (await db.scalars(_keyset(stmt, model, cursor, limit))).all()
+    return _page(rows, limit)
+
+
+async def fetch_row_page(db: AsyncSession, stmt: Select, model, cursor: Optional[str], limit: int) -> dict:
+    """fetch_page for column SELECTs; rows must include the created_at and id columns"""
+    rows = (await db.execute(_keyset(stmt, model, cursor, limit))).all()
+    return _page(rows, limit)
+
+
+async def fetch_ranked_page(db: AsyncSession, stmt: Select, rank, model, cursor: Optional[str], limit: int) -> dict:
+    """Run a keyset-paginated column SELECT ordered by (rank, id), best match first"""
+    if cursor:
+        try:
+            last_rank, row_id = _decode(cursor)
+            last_rank, row_id = float(last_rank), int(row_id)
+        except (ValueError, TypeError):
+            raise _invalid_cursor()
+        stmt = stmt.where(tuple_(rank, model.id) < (last_rank, row_id))
+    stmt = stmt.add_columns(rank.label("search_rank")).order_by(rank.desc(), model.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode([rows[-1].search_rank, rows[-1].id])
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,168 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, func, insert, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import Blog, Category, Tag, User, blog_search_vector, blog_tag
+
+# Loaders for everything BlogResponse touches: the many-to-one category is
+# joined into the main query, tags come from one extra IN query per page
+BLOG_RESPONSE_OPTIONS = (
+    joinedload(Blog.category),
+    selectinload(Blog.tags),
+)
+
+# Tables whose changes can alter a serialized BlogResponse
+BLOG_TABLES = ("blogs", "categories", "tags")
+
+
+def blog_query() -> Select:
+    """Base SELECT for every blog read path"""
+    return select(Blog).options(*BLOG_RESPONSE_OPTIONS)
+
+
+# Fields a client can pick with ?fields=, in response (schema) order
+BLOG_FIELDS = ("id", "title", "author", "category", "tags", "created_at", "updated_at")
+USER_FIELDS = ("email", "full_name", "id", "role", "is_active", "created_at", "updated_at")
+
+# ?fields=title,author returns only those fields, selecting only their columns
+BLOG_FIELDS_QUERY = Query(None, description=f"Comma-separated subset of: {', '.join(BLOG_FIELDS)}")
+USER_FIELDS_QUERY = Query(None, description=f"Comma-separated subset of: {', '.join(USER_FIELDS)}")
+
+# Columns each blog field needs; tags come from load_blog_tags()
+_BLOG_FIELD_COLUMNS = {
+    "id": (),
+    "title": (Blog.title,),
+    "author": (Blog.author,),
+    "category": (Category.id.label("category_id"), Category.name.label("category_name")),
+    "tags": (),
+    "created_at": (),
+    "updated_at": (Blog.updated_at,),
+}
+
+
+def parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Comma-separated ?fields= value as a tuple in schema order; all fields when absent"""
+    if not fields:
+        return allowed
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}",
+        )
+    return tuple(field for field in allowed if field in requested)
+
+
+def blog_columns(fields: Tuple[str, ...] = BLOG_FIELDS) -> list:
+    """Columns selected for the given blog fields, always with the keyset columns"""
+    columns = [Blog.id, Blog.created_at]
+    for field in fields:
+        columns.extend(_BLOG_FIELD_COLUMNS[field])
+    return columns
+
+
+def user_columns(fields: Tuple[str, ...] = USER_FIELDS) -> list:
+    """Columns selected for the given user fields, always with the keyset columns"""
+    columns = [User.id, User.created_at]
+    columns.extend(getattr(User, field) for field in fields if field not in ("id", "created_at"))
+    return columns
+
+
+def blog_rows_query(fields: Tuple[str, ...] = BLOG_FIELDS) -> Select:
+    """Blog SELECT of plain column tuples; the category is joined only when requested"""
+    stmt = select(*blog_columns(fields))
+    if "category" in fields:
+        stmt = stmt.join(Category, Category.id == Blog.category_id)
+    return stmt
+
+
+async def load_blog_tags(db: AsyncSession, blog_ids: List[int]) -> Dict[int, List[tuple]]:
+    """(tag id, tag name) pairs of each blog, in one query"""
+    tags: Dict[int, List[tuple]] = {blog_id: [] for blog_id in blog_ids}
+    if not blog_ids:
+        return tags
+    result = await db.execute(
+        select(blog_tag.c.blog_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == blog_tag.c.tag_id)
+        .where(blog_tag.c.blog_id.in_(blog_ids))
+        .order_by(blog_tag.c.blog_id, Tag.id)
+    )
+    for blog_id, tag_id, name in result:
+        tags[blog_id].append((tag_id, name))
+    return tags
+
+
+async def load_row_tags(db: AsyncSession, rows: list, fields: Tuple[str, ...]) -> Optional[Dict[int, List[tuple]]]:
+    """Tags of the given blog rows, or None without a query when tags were not requested"""
+    if "tags" not in fields:
+        return None
+    return await load_blog_tags(db, [row.id for row in rows])
+
+
+async def insert_blog(db: AsyncSession, title: str, author: str, category_id: int, tag_ids: List[int]):
+    """INSERT a blog and its tag links; returns the new row's id and server defaults"""
+    row = (await db.execute(
+        insert(Blog)
+        .values(title=title, author=author, category_id=category_id)
+        .returning(Blog.id, Blog.created_at, Blog.updated_at)
+    )).one()
+    if tag_ids:
+        await db.execute(insert(blog_tag), [{"blog_id": row.id, "tag_id": tag_id} for tag_id in tag_ids])
+    return row
+
+
+def filter_blogs(
+    stmt: Select,
+    category_id: Optional[int] = None,
+    tag_ids: Optional[List[int]] = None,
+    match_all_tags: bool = False,
+    author: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Select:
+    """Restrict a blog SELECT by category, tags, author and creation date"""
+    if category_id is not None:
+        stmt = stmt.where(Blog.category_id == category_id)
+    if author is not None:
+        stmt = stmt.where(Blog.author == author)
+    if created_after is not None:
+        stmt = stmt.where(Blog.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(Blog.created_at < created_before)
+    if tag_ids:
+        tag_ids = set(tag_ids)
+        tagged = select(blog_tag.c.blog_id).where(blog_tag.c.tag_id.in_(tag_ids))
+        if match_all_tags:
+            # Semi-join on blogs carrying every requested tag
+            tagged = tagged.group_by(blog_tag.c.blog_id).having(func.count() == len(tag_ids))
+        stmt = stmt.where(Blog.id.in_(tagged))
+    return stmt
+
+
+def _fts5_query(q: str) -> str:
+    """Quote each term so user input cannot inject FTS5 query syntax"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+def blog_search_query(dialect: str, q: str, stmt: Select) -> Tuple[Select, ColumnElement]:
+    """Blog SELECT restricted to full-text matches on title/author, plus its relevance"""
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        rank = func.ts_rank(blog_search_vector, ts_query)
+        return stmt.where(blog_search_vector.op("@@")(ts_query)), rank
+
+    # SQLite FTS5; bm25() is lower for better matches
+    fts = literal_column("blogs_fts")
+    matches = (
+        select(literal_column("rowid").label("blog_id"), (-func.bm25(fts)).label("rank"))
+        .select_from(table("blogs_fts"))
+        .where(fts.op("MATCH")(_fts5_query(q)))
+        .subquery()
+    )
+    return stmt.join(matches, matches.c.blog_id == Blog.id), matches.c.rank
@@ -0,0 +1,139 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+
+# Sliding-window counters: each key keeps the request count of the current and
+# the previous fixed window, and the previous one is weighted by how much of it
+# still overlaps the sliding window. Two integers per key, whatever the rate.
+
+
+def _window_position(window: int) -> Tuple[int, float]:
+    """Index of the current fixed window and how far into it we are (0..1)"""
+    index, elapsed_fraction = divmod(time.time() / window, 1)
+    return int(index), elapsed_fraction
+
+
+def _estimate(previous: int, current: int, elapsed_fraction: float) -> float:
+    return previous * (1 - elapsed_fraction) + current
+
+
+def _retry_after(previous: int, current: int, elapsed_fraction: float, limit: int, window: int) -> int:
+    """Seconds until the sliding estimate drops below the limit again"""
+    if current >= limit or previous == 0:
+        wait = (1 - elapsed_fraction) * window
+    else:
+        # previous * (1 - f) + current < limit  <=>  f > 1 - (limit - current) / previous
+        wait = (1 - (limit - current) / previous - elapsed_fraction) * window
+    return max(1, math.ceil(wait))
+
+
+class MemoryRateLimitStore:
+    """Per-process counters in a bounded LRU map"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [window index, previous count, current count]
+        self._counters: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def hit(self, key: Hashable, limit: int, window: int) -> Optional[int]:
+        """Count a request for key; return Retry-After seconds if it is over the limit"""
+        index, elapsed_fraction = _window_position(window)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = [index, 0, 0]
+                while len(self._counters) > self.max_keys:
+                    self._counters.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._counters.move_to_end(key)
+            if counter[0] != index:
+                # Roll the windows forward; a gap of more than one window resets both
+                counter[1] = counter[2] if counter[0] == index - 1 else 0
+                counter[2] = 0
+                counter[0] = index
+            _, previous, current = counter
+            if _estimate(previous, current, elapsed_fraction) >= limit:
+                return _retry_after(previous, current, elapsed_fraction, limit, window)
+            counter[2] += 1
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "keys": len(self._counters),
+                "max_keys": self.max_keys,
+                "evictions": self.evictions,
+            }
+
+
+class RedisRateLimitStore:
+    """Counters shared by every worker, kept in Redis with per-window expiry"""
+
+    def __init__(self, url: str):
+        # Optional dependency, only needed when RATE_LIMIT_REDIS_URL is set
+        import redis.asyncio as redis
+
+        self.url = url
+        self._redis = redis.from_url(url)
+
+    async def hit(self, key: Tuple, limit: int, window: int) -> Optional[int]:
+        index, elapsed_fraction = _window_position(window)
+        prefix = "ratelimit:" + ":".join(str(part) for part in key)
+        previous_key, current_key = f"{prefix}:{index - 1}", f"{prefix}:{index}"
+
+        previous, current = await self._redis.mget(previous_key, current_key)
+        previous, current = int(previous or 0), int(current or 0)
+        if _estimate(previous, current, elapsed_fraction) >= limit:
+            return _retry_after(previous, current, elapsed_fraction, limit, window)
+
+        # Concurrent workers may each pass the check above, overshooting by at most their number
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, 2 * window)
+            await pipe.execute()
+        return None
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+def _create_store():
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitStore(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limit_store = _create_store()
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limits(action: str, request: Request, email: str, per_ip: int, per_email: int) -> None:
+    """Reject with 429 when the caller's IP or the targeted email exceeded its budget"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    for key, limit in (
+        ((action, "ip", client_ip(request)), per_ip),
+        ((action, "email", email.lower()), per_email),
+    ):
+        retry_after = await rate_limit_store.hit(key, limit, window)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please retry later",
+                headers={"Retry-After": str(retry_after)},
+            )
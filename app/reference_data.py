@@ -0,0 +1,111 @@
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Category, Tag
+from app.versions import get_versions
+
+# Categories and tags are tiny and rarely written, but every blog post and
+# admin listing used to query them. Each worker keeps their id -> name maps
+# in memory, tagged with the table_versions rows they were loaded at. Admin
+# writes in this worker reload the maps right after committing; writes in
+# other workers are noticed by re-reading the version rows at most once per
+# REFERENCE_DATA_CHECK_SECONDS.
+
+TABLES = ("categories", "tags")
+
+
+class ReferenceData(NamedTuple):
+    versions: Dict[str, int]
+    categories: Dict[int, str]
+    tags: Dict[int, str]
+
+
+class ReferenceDataCache:
+    """Versioned in-process copy of the category and tag id/name maps"""
+
+    def __init__(self, check_seconds: float):
+        self.check_seconds = check_seconds
+        self._data: Optional[ReferenceData] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.version_checks = 0
+        self.reloads = 0
+
+    async def get(self, db: AsyncSession) -> ReferenceData:
+        """Cached maps, re-checking the version rows once the check interval has passed"""
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            self.hits += 1
+            return data
+        return await self.refresh(db)
+
+    async def refresh(self, db: AsyncSession) -> ReferenceData:
+        """Re-read the version rows now and reload the maps if either table changed
+
+        Admin handlers call this after committing a category or tag change.
+        """
+        checked_at = time.monotonic()
+        versions = await get_versions(db, *TABLES)
+        self.version_checks += 1
+        data = self._data
+        if data is None or data.versions != versions:
+            # Versions are read first, so the maps are at least as new as them
+            categories = dict((await db.execute(select(Category.id, Category.name).order_by(Category.id))).all())
+            tags = dict((await db.execute(select(Tag.id, Tag.name).order_by(Tag.id))).all())
+            loaded = ReferenceData(versions, categories, tags)
+            self.reloads += 1
+            # A concurrent refresh (or a lagging replica) must not replace newer maps
+            if data is not None and any(data.versions[table] > versions[table] for table in TABLES):
+                return loaded
+            self._data = data = loaded
+        self._checked_at = checked_at
+        return data
+
+    def expire(self) -> None:
+        """Re-check the version rows on the next get(), for writers that cannot refresh inline"""
+        self._checked_at = 0.0
+
+    def stats(self) -> dict:
+        data = self._data
+        return {
+            "check_seconds": self.check_seconds,
+            "versions": data.versions if data else None,
+            "categories": len(data.categories) if data else 0,
+            "tags": len(data.tags) if data else 0,
+            "hits": self.hits,
+            "version_checks": self.version_checks,
+            "reloads": self.reloads,
+        }
+
+
+reference_data = ReferenceDataCache(settings.REFERENCE_DATA_CHECK_SECONDS)
+
+
+def _known(data: ReferenceData, category_id: int, tag_ids: Iterable[int]) -> bool:
+    return category_id in data.categories and all(tag_id in data.tags for tag_id in tag_ids)
+
+
+async def resolve_blog_references(
+    db: AsyncSession, category_id: int, tag_ids: List[int], refresh: bool = False
+) -> Tuple[str, List[Tuple[int, str]]]:
+    """Category name and (id, name) tag pairs for a new blog, without querying when cached
+
+    Raises 404 for an unknown category and 400 for unknown (or repeated) tags.
+    """
+    data = await (reference_data.refresh(db) if refresh else reference_data.get(db))
+    if not refresh and not _known(data, category_id, tag_ids):
+        # Possibly created by another worker since the last version check
+        data = await reference_data.refresh(db)
+
+    category_name = data.categories.get(category_id)
+    if category_name is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    tags = [(tag_id, data.tags[tag_id]) for tag_id in dict.fromkeys(tag_ids) if tag_id in data.tags]
+    if len(tags) != len(tag_ids):
+        raise HTTPException(status_code=400, detail="One or more tags not found")
+    return category_name, tags
@@ -1,87 +1,252 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic_core import to_json
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database import get_db
-from app.models import Blog, Category, Tag, User,UserRole
+from app.cache import TTLCache
+from app.config import settings
+from app.blog_counts import count_blogs
+from app.database import async_engine, dialect_insert, get_async_db, replicas
+from app.hashing import password_hasher
+from app.jobs import job_runner
+from app.pool_metrics import pool_metrics
+from app.models import Blog, Category, Job, JobStatus, Tag, User,UserRole, blog_tag
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_row_page
+from app.rate_limit import rate_limit_store
+from app.queries import BLOG_FIELDS, BLOG_FIELDS_QUERY, BLOG_TABLES, blog_rows_query, insert_blog, load_row_tags, parse_fields
+from app.reference_data import reference_data, resolve_blog_references
+from app.serialization import RawJSONResponse, blog_from_insert, blog_page_response, blog_response
 from app.schemas import (
-    BlogCreate, BlogUpdate, BlogResponse,
-    CategoryCreate, CategoryUpdate, CategoryResponse,
-    TagCreate, TagUpdate, TagResponse
+    BlogCreate, BlogUpdate, BlogResponse, BlogPage,
+    BulkBlogResponse, BulkItemResult,
+    CategoryCreate, CategoryUpdate, CategoryResponse, CategoryListResponse,
+    DeleteCategoryJob, JobCreate, JobResponse,
+    NameBulkUpsert,
+    TagCreate, TagUpdate, TagResponse, TagCountResponse,
+    TokenData
 )
-from app.user_role import require_admin
+from app.user_role import get_read_db, require_admin, principal_cache
+from app.versions import bump_versions, check_not_modified
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Rows per multi-row INSERT and commit in bulk endpoints
+BULK_CHUNK_SIZE = 1000
+
+
+# Dashboard statistics are shared by every admin for a short TTL
+dashboard_cache = TTLCache(max_size=1, ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def _count(model):
+    return select(func.count()).select_from(model).scalar_subquery()
+
+
+async def _dashboard_statistics(db: AsyncSession) -> dict:
+    """Collect every dashboard counter in a single query"""
+    result = await db.execute(
+        select(
+            func.count().label("total_users"),
+            func.count(case((User.is_active == True, 1))).label("active_users"),
+            func.count(case((User.role == UserRole.ADMIN, 1))).label("admin_count"),
+            func.count(case((User.role == UserRole.USER, 1))).label("user_count"),
+            _count(Blog).label("blog_count"),
+            _count(Category).label("category_count"),
+            _count(Tag).label("tag_count"),
+        ).select_from(User)
+    )
+    row = result.one()
+    return {
+        "total_users": row.total_users,
+        "active_users": row.active_users,
+        "inactive_users": row.total_users - row.active_users,
+        "admin_count": row.admin_count,
+        "user_count": row.user_count,
+        "blog_count": row.blog_count,
+        "category_count": row.category_count,
+        "tag_count": row.tag_count,
+    }
+
 
 @router.get("/dashboard")
-def admin_dashboard(
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+async def admin_dashboard(
+    admin_user: TokenData = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Admin dashboard with statistics (Admin only)"""
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    admin_count = db.query(User).filter(User.role == UserRole.ADMIN).count()
-    user_count = db.query(User).filter(User.role == UserRole.USER).count()
+    statistics = dashboard_cache.get("statistics")
+    if statistics is None:
+        statistics = await _dashboard_statistics(db)
+        dashboard_cache.set("statistics", statistics)
     
     return {
         "message": f"Welcome Admin {admin_user.email}!",
-        "statistics": {
-            "total_users": total_users,
-            "active_users": active_users,
-            "inactive_users": total_users - active_users,
-            "admin_count": admin_count,
-            "user_count": user_count
-        }
+        "statistics": statistics
+    }
+
+
+@router.get("/metrics/principal-cache")
+async def principal_cache_metrics(admin_user: TokenData = Depends(require_admin)):
+    """Hit/miss statistics of the authenticated principal cache (Admin only)"""
+    return principal_cache.stats()
+
+
+@router.get("/metrics/db-pool")
+async def db_pool_metrics(admin_user: TokenData = Depends(require_admin)):
+    """Connection pool usage, checkout wait times and pre-ping failures (Admin only)"""
+    pools = {
+        "primary": pool_metrics["primary"].snapshot(async_engine.pool),
     }
+    for replica in replicas.engines:
+        # Each replica's pool is instrumented under its logging name, "replica-N"
+        name = replica.pool.logging_name
+        pools[name] = pool_metrics[name].snapshot(replica.pool)
+    return pools
+
+
+@router.get("/metrics/startup")
+async def startup_metrics(request: Request, admin_user: TokenData = Depends(require_admin)):
+    """Time spent in each startup task of this worker (Admin only)"""
+    return getattr(request.app.state, "startup_timings", {})
+
+
+@router.get("/metrics/password-hashing")
+async def password_hashing_metrics(admin_user: TokenData = Depends(require_admin)):
+    """Queue depth, rejections and p50/p99 latency of password hashing (Admin only)"""
+    return password_hasher.stats()
+
+
+@router.get("/metrics/reference-data")
+async def reference_data_metrics(admin_user: TokenData = Depends(require_admin)):
+    """Cached category/tag map versions, hits and reloads of this worker (Admin only)"""
+    return reference_data.stats()
+
+
+@router.get("/metrics/jobs")
+async def job_metrics(admin_user: TokenData = Depends(require_admin)):
+    """Jobs running in this worker and chunks processed so far (Admin only)"""
+    return job_runner.stats()
+
+
+@router.get("/metrics/rate-limit")
+async def rate_limit_metrics(admin_user: TokenData = Depends(require_admin)):
+    """Keys tracked and evictions of the login/register rate limiter (Admin only)"""
+    return rate_limit_store.stats()
+
+
+async def _upsert_names(db: AsyncSession, model, names: List[str]) -> List[dict]:
+    """Idempotently insert unique names with ON CONFLICT DO NOTHING ... RETURNING"""
+    names = list(dict.fromkeys(names))
+    insert_ = dialect_insert(db)
+
+    ids = {}
+    inserted = 0
+    for start in range(0, len(names), BULK_CHUNK_SIZE):
+        chunk = names[start:start + BULK_CHUNK_SIZE]
+        stmt = (
+            insert_(model)
+            .values([{"name": name} for name in chunk])
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(model.id, model.name)
+        )
+        created = {row.name: row.id for row in await db.execute(stmt)}
+        inserted += len(created)
+        ids.update(created)
+
+        # Names that already existed are not returned by DO NOTHING
+        existing = [name for name in chunk if name not in ids]
+        if existing:
+            result = await db.execute(select(model.id, model.name).where(model.name.in_(existing)))
+            ids.update({row.name: row.id for row in result})
+
+    if inserted:
+        await bump_versions(db, model.__tablename__)
+    await db.commit()
+    if inserted:
+        await reference_data.refresh(db)
+    return [{"id": ids[name], "name": name} for name in names]
+
 
 @router.post("/categories", response_model=CategoryResponse)
-def create_category(
+async def create_category(
     category: CategoryCreate,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: TokenData = Depends(require_admin)
 ):
-    existing = db.query(Category).filter(Category.name == category.name).first()
+    existing = await db.scalar(select(Category).where(Category.name == category.name))
     if existing:
         raise HTTPException(status_code=400, detail="Category already exists")
     
     new_category = Category(name=category.name)
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await bump_versions(db, "categories")
+    await db.commit()
+    await db.refresh(new_category)
+    await reference_data.refresh(db)
     return new_category
 
-@router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    return db.query(Category).all()
+@router.put("/categories/bulk", response_model=List[CategoryResponse])
+async def upsert_categories_bulk(
+    data: NameBulkUpsert,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: TokenData = Depends(require_admin)
+):
+    """Create any missing categories and return the id of every name (Admin only)"""
+    return await _upsert_names(db, Category, data.names)
+
+@router.get("/categories", response_model=List[CategoryListResponse], response_model_exclude_none=True)
+async def get_categories(request: Request, response: Response, with_counts: bool = False, db: AsyncSession = Depends(get_read_db), admin_user: TokenData = Depends(require_admin)):
+    """List categories; with_counts=1 adds each category's blog_count (Admin only)"""
+    if with_counts:
+        not_modified = await check_not_modified(request, response, db, "categories", "blogs")
+        if not_modified:
+            return not_modified
+        # Denormalized counters: no GROUP BY over blogs
+        rows = await db.execute(select(Category.name, Category.id, Category.blog_count))
+        return RawJSONResponse(to_json([row._asdict() for row in rows]), headers=response.headers)
+    data = await reference_data.get(db)
+    not_modified = await check_not_modified(request, response, db, "categories", versions=data.versions)
+    if not_modified:
+        return not_modified
+    return [{"name": name, "id": category_id} for category_id, name in data.categories.items()]
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    category = db.query(Category).get(category_id)
-    if not category:
+async def get_category(category_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db), admin_user: TokenData = Depends(require_admin)):
+    data = await reference_data.get(db)
+    if category_id not in data.categories:
+        data = await reference_data.refresh(db)
+    not_modified = await check_not_modified(request, response, db, "categories", versions=data.versions)
+    if not_modified:
+        return not_modified
+    if category_id not in data.categories:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    return {"name": data.categories[category_id], "id": category_id}
 
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
-def update_category(category_id: int, category: CategoryUpdate, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    db_category = db.query(Category).get(category_id)
+async def update_category(category_id: int, category: CategoryUpdate, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
     if category.name:
         db_category.name = category.name
-    db.commit()
-    db.refresh(db_category)
+    await bump_versions(db, "categories")
+    await db.commit()
+    await db.refresh(db_category)
+    await reference_data.refresh(db)
     return db_category
 
 @router.delete("/categories/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    db_category = db.query(Category).get(category_id)
+async def delete_category(category_id: int, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
-    db.delete(db_category)
-    db.commit()
+    await db.delete(db_category)
+    await bump_versions(db, "categories", "blogs")
+    await db.commit()
+    await reference_data.refresh(db)
     return {"message": "Category deleted successfully"}
 
 
@@ -90,45 +255,85 @@ def delete_category(category_id: int, db: Session = Depends(get_db), admin_user:
 # Tag CRUD
 
 @router.post("/tags", response_model=TagResponse)
-def create_tag(tag: TagCreate, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    existing = db.query(Tag).filter(Tag.name == tag.name).first()
+async def create_tag(tag: TagCreate, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    existing = await db.scalar(select(Tag).where(Tag.name == tag.name))
     if existing:
         raise HTTPException(status_code=400, detail="Tag already exists")
     new_tag = Tag(name=tag.name)
     db.add(new_tag)
-    db.commit()
-    db.refresh(new_tag)
+    await bump_versions(db, "tags")
+    await db.commit()
+    await db.refresh(new_tag)
+    await reference_data.refresh(db)
     return new_tag
 
+@router.put("/tags/bulk", response_model=List[TagResponse])
+async def upsert_tags_bulk(
+    data: NameBulkUpsert,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: TokenData = Depends(require_admin)
+):
+    """Create any missing tags and return the id of every name (Admin only)"""
+    return await _upsert_names(db, Tag, data.names)
+
 @router.get("/tags", response_model=List[TagResponse])
-def get_tags(db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    return db.query(Tag).all()
+async def get_tags(request: Request, response: Response, db: AsyncSession = Depends(get_read_db), admin_user: TokenData = Depends(require_admin)):
+    data = await reference_data.get(db)
+    not_modified = await check_not_modified(request, response, db, "tags", versions=data.versions)
+    if not_modified:
+        return not_modified
+    return [{"name": name, "id": tag_id} for tag_id, name in data.tags.items()]
+
+# Declared before "/tags/{tag_id}" so that it does not capture "/tags/top"
+@router.get("/tags/top", response_model=List[TagCountResponse])
+async def get_top_tags(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user: TokenData = Depends(require_admin)
+):
+    """Tags carrying the most blogs, from the blog_count index (Admin only)"""
+    not_modified = await check_not_modified(request, response, db, "tags", "blogs")
+    if not_modified:
+        return not_modified
+    stmt = select(Tag).order_by(Tag.blog_count.desc(), Tag.id.desc()).limit(limit)
+    return (await db.scalars(stmt)).all()
 
 @router.get("/tags/{tag_id}", response_model=TagResponse)
-def get_tag(tag_id: int, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    tag = db.query(Tag).get(tag_id)
-    if not tag:
+async def get_tag(tag_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db), admin_user: TokenData = Depends(require_admin)):
+    data = await reference_data.get(db)
+    if tag_id not in data.tags:
+        data = await reference_data.refresh(db)
+    not_modified = await check_not_modified(request, response, db, "tags", versions=data.versions)
+    if not_modified:
+        return not_modified
+    if tag_id not in data.tags:
         raise HTTPException(status_code=404, detail="Tag not found")
-    return tag
+    return {"name": data.tags[tag_id], "id": tag_id}
 
 @router.put("/tags/{tag_id}", response_model=TagResponse)
-def update_tag(tag_id: int, tag: TagUpdate, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    db_tag = db.query(Tag).get(tag_id)
+async def update_tag(tag_id: int, tag: TagUpdate, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    db_tag = await db.get(Tag, tag_id)
     if not db_tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     if tag.name:
         db_tag.name = tag.name
-    db.commit()
-    db.refresh(db_tag)
+    await bump_versions(db, "tags")
+    await db.commit()
+    await db.refresh(db_tag)
+    await reference_data.refresh(db)
     return db_tag
 
 @router.delete("/tags/{tag_id}")
-def delete_tag(tag_id: int, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    db_tag = db.query(Tag).get(tag_id)
+async def delete_tag(tag_id: int, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    db_tag = await db.get(Tag, tag_id)
     if not db_tag:
         raise HTTPException(status_code=404, detail="Tag not found")
-    db.delete(db_tag)
-    db.commit()
+    await db.delete(db_tag)
+    await bump_versions(db, "tags", "blogs")
+    await db.commit()
+    await reference_data.refresh(db)
     return {"message": "Tag deleted successfully"}
 
 
@@ -136,44 +341,157 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db), admin_user: User = De
 # Blog CRUD
 
 @router.post("/blogs", response_model=BlogResponse)
-def create_blog(blog: BlogCreate, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    # Validate category
-    category = db.query(Category).get(blog.category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Validate tags
-    tags = db.query(Tag).filter(Tag.id.in_(blog.tag_ids)).all() if blog.tag_ids else []
-    
-    # Ensure all tag_ids exist
-    if blog.tag_ids and len(tags) != len(blog.tag_ids):
-        raise HTTPException(status_code=400, detail="One or more tags not found")
-    
-    # Create blog and assign tags
-    new_blog = Blog(
-        title=blog.title,
-        author=blog.author,
-        category=category,
-    )
-    new_blog.tags = tags  # assign AFTER creation
-    
-    db.add(new_blog)
-    db.commit()
-    db.refresh(new_blog)
-    
-    return new_blog
+async def create_blog(blog: BlogCreate, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    # Validated against the cached category/tag maps
+    category_name, tags = await resolve_blog_references(db, blog.category_id, blog.tag_ids)
+    tag_ids = [tag_id for tag_id, _ in tags]
+    try:
+        row = await insert_blog(db, blog.title, blog.author, blog.category_id, tag_ids)
+        await count_blogs(db, [(blog.category_id, tag_ids)])
+        await bump_versions(db, "blogs")
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        # Deleted by another worker since our last version check: answer as a fresh lookup would
+        await resolve_blog_references(db, blog.category_id, blog.tag_ids, refresh=True)
+        raise
 
+    return blog_from_insert(row, blog.title, blog.author, blog.category_id, category_name, tags)
 
 
-@router.get("/blogs", response_model=List[BlogResponse])
-def get_blogs(db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    return db.query(Blog).all()
+
+@router.post("/blogs/bulk", response_model=BulkBlogResponse)
+async def create_blogs_bulk(
+    blogs: List[BlogCreate],
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: TokenData = Depends(require_admin)
+):
+    """Create many blogs at once with multi-row inserts, committing per chunk (Admin only)"""
+    # Validate every referenced category and tag against the cached maps
+    data = await reference_data.get(db)
+    if any(blog.category_id not in data.categories or not data.tags.keys() >= set(blog.tag_ids) for blog in blogs):
+        data = await reference_data.refresh(db)
+    known_categories = data.categories.keys()
+    known_tags = data.tags.keys()
+
+    results = []
+    valid = []
+    for index, blog in enumerate(blogs):
+        if blog.category_id not in known_categories:
+            results.append(BulkItemResult(index=index, error="Category not found"))
+        elif len(set(blog.tag_ids)) != len(blog.tag_ids) or not known_tags >= set(blog.tag_ids):
+            # Repeated ids are rejected like unknown ones, as in POST /admin/blogs
+            results.append(BulkItemResult(index=index, error="One or more tags not found"))
+        else:
+            valid.append((index, blog))
+
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        chunk = valid[start:start + BULK_CHUNK_SIZE]
+        try:
+            blog_ids = (await db.scalars(
+                insert(Blog).returning(Blog.id, sort_by_parameter_order=True),
+                [
+                    {"title": blog.title, "author": blog.author, "category_id": blog.category_id}
+                    for _, blog in chunk
+                ],
+            )).all()
+            links = [
+                {"blog_id": blog_id, "tag_id": tag_id}
+                for blog_id, (_, blog) in zip(blog_ids, chunk)
+                for tag_id in blog.tag_ids
+            ]
+            if links:
+                await db.execute(insert(blog_tag), links)
+            await count_blogs(db, [(blog.category_id, blog.tag_ids) for _, blog in chunk])
+            await bump_versions(db, "blogs")
+            await db.commit()
+        except SQLAlchemyError as exc:
+            await db.rollback()
+            error = f"Insert failed: {exc.__class__.__name__}"
+            results.extend(BulkItemResult(index=index, error=error) for index, _ in chunk)
+            continue
+        results.extend(BulkItemResult(index=index, id=blog_id) for blog_id, (index, _) in zip(blog_ids, chunk))
+
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.id is not None)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+@router.get("/blogs", response_model=BlogPage)
+async def get_blogs(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = BLOG_FIELDS_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: TokenData = Depends(require_admin)
+):
+    fields = parse_fields(fields, BLOG_FIELDS)
+    not_modified = await check_not_modified(request, response, db, *BLOG_TABLES)
+    if not_modified:
+        return not_modified
+    page = await fetch_row_page(db, blog_rows_query(fields), Blog, cursor, limit)
+    tags = await load_row_tags(db, page["items"], fields)
+    return blog_page_response(page, tags, fields, headers=response.headers)
 
 @router.get("/blogs/{blog_id}", response_model=BlogResponse)
-def get_blog(blog_id: int, db: Session = Depends(get_db), admin_user: User = Depends(require_admin)):
-    blog = db.query(Blog).get(blog_id)
-    if not blog:
+async def get_blog(blog_id: int, request: Request, response: Response, fields: Optional[str] = BLOG_FIELDS_QUERY, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    fields = parse_fields(fields, BLOG_FIELDS)
+    not_modified = await check_not_modified(request, response, db, *BLOG_TABLES)
+    if not_modified:
+        return not_modified
+    row = (await db.execute(blog_rows_query(fields).where(Blog.id == blog_id))).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Blog not found")
-    return blog
+    tags = await load_row_tags(db, [row], fields)
+    return blog_response(row, tags and tags[blog_id], fields, headers=response.headers)
+
+
+# Background jobs
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(job: JobCreate, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    """Queue a long-running operation; poll GET /admin/jobs/{id} for its progress (Admin only)"""
+    if isinstance(job, DeleteCategoryJob):
+        data = await reference_data.get(db)
+        if job.category_id not in data.categories:
+            data = await reference_data.refresh(db)
+        if job.category_id not in data.categories:
+            raise HTTPException(status_code=404, detail="Category not found")
 
+    new_job = Job(kind=job.kind, params=job.model_dump(exclude={"kind"}, exclude_none=True), created_by=admin_user.id)
+    db.add(new_job)
+    await db.commit()
+    await db.refresh(new_job)
+    job_runner.notify()
+    return new_job
 
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    """Status, progress and checkpoint of a job (Admin only)"""
+    # Read from the primary: progress on a lagging replica would look stuck
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_async_db), admin_user: TokenData = Depends(require_admin)):
+    """Cancel a queued job now, or a running one after its current chunk (Admin only)"""
+    # Chunks already committed stay applied
+    await db.execute(
+        update(Job).where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+        .values(status=JobStatus.CANCELLED, cancel_requested=True, finished_at=func.now())
+    )
+    await db.execute(
+        update(Job).where(Job.id == job_id, Job.status == JobStatus.RUNNING)
+        .values(cancel_requested=True)
+    )
+    await db.commit()
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.cancel_requested:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    return job
@@ -1,18 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, UserRole
-from app.schemas import Token, UserCreate, UserResponse, UserLogin
-from app.user_role import hash_password, verify_password, create_access_token
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
+from app.hashing import DUMMY_HASH
+from app.models import RefreshToken, User, UserRole
+from app.rate_limit import enforce_rate_limits
+from app.schemas import RefreshRequest, Token, UserCreate, UserResponse, UserLogin
+from app.user_role import (
+    hash_password,
+    verify_and_update_password,
+    create_access_token,
+    create_refresh_token,
+    hash_refresh_token,
+    invalidate_user,
+    prune_refresh_tokens,
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Register a new user (default role: user)"""
+    # Before any query or hashing; the session has not connected yet
+    await enforce_rate_limits(
+        "register", request, user_data.email,
+        settings.REGISTER_RATE_LIMIT_PER_IP, settings.REGISTER_RATE_LIMIT_PER_EMAIL,
+    )
+
     # Check if user already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await db.scalar(select(User).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -21,24 +40,92 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create new user
     new_user = User(
         email=user_data.email,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=await hash_password(user_data.password),
         full_name=user_data.full_name,
         role=UserRole.USER
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Login with email and password - returns access token"""
-    user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    await enforce_rate_limits(
+        "login", request, login_data.email,
+        settings.LOGIN_RATE_LIMIT_PER_IP, settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+    )
+    user = await db.scalar(select(User).where(User.email == login_data.email))
+    if not user:
+        # Same verification as a wrong password, so timing does not reveal registered emails
+        await verify_and_update_password(login_data.password, DUMMY_HASH)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    valid, new_hash = await verify_and_update_password(login_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user account")
     
-    access_token = create_access_token(user.email, user.role.value)
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Transparently upgrade legacy or outdated hashes
+    if new_hash:
+        user.hashed_password = new_hash
+    
+    access_token = create_access_token(user.email, user.role.value, user.id, user.token_version)
+    refresh_token = create_refresh_token(db, user)
+    # Every login adds a row; clear out this user's expired and long-used ones
+    await prune_refresh_tokens(db, RefreshToken.user_id == user.id)
+    await db.commit()
+    if new_hash:
+        invalidate_user(user.email)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    invalid = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
+    
+    stored = await db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(data.refresh_token))
+    )
+    if not stored:
+        raise invalid
+    
+    # Consume the token atomically so concurrent refreshes cannot both win
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.used_at.is_(None))
+        .values(used_at=func.now())
+    )
+    if result.rowcount == 0:
+        # An already rotated token was presented again: assume it leaked
+        # and revoke every token of the same login
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == stored.family_id, RefreshToken.used_at.is_(None))
+            .values(used_at=func.now())
+        )
+        await db.commit()
+        raise invalid
+    
+    expires_at = stored.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    user = await db.get(User, stored.user_id)
+    if (
+        expires_at <= datetime.now(timezone.utc)
+        or not user
+        or not user.is_active
+        or user.token_version != stored.token_version
+    ):
+        await db.commit()
+        raise invalid
+    
+    access_token = create_access_token(user.email, user.role.value, user.id, user.token_version)
+    refresh_token = create_refresh_token(db, user, stored.family_id)
+    # Every rotation adds a row to the family; drop the ones it no longer needs
+    await prune_refresh_tokens(db, RefreshToken.family_id == stored.family_id)
+    await db.commit()
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
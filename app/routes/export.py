@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Tuple
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+
+from app.database import AsyncSessionLocal
+from app.models import Blog, User
+from app.queries import BLOG_FIELDS, USER_FIELDS, blog_query, user_columns
+from app.schemas import ExportFormat, TokenData
+from app.user_role import require_admin
+
+router = APIRouter(prefix="/admin/export", tags=["Admin"])
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _blog_record(blog) -> dict:
+    return {
+        "id": blog.id,
+        "title": blog.title,
+        "author": blog.author,
+        "category": blog.category.name,
+        "tags": [tag.name for tag in blog.tags],
+        "created_at": _isoformat(blog.created_at),
+        "updated_at": _isoformat(blog.updated_at),
+    }
+
+
+def _user_record(row) -> dict:
+    return {
+        "email": row.email,
+        "full_name": row.full_name,
+        "id": row.id,
+        "role": row.role.value,
+        "is_active": row.is_active,
+        "created_at": _isoformat(row.created_at),
+        "updated_at": _isoformat(row.updated_at),
+    }
+
+
+def _csv(rows: Iterable[list]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _encode(records: Iterable[dict], fields: Tuple[str, ...], export_format: ExportFormat) -> str:
+    """Render a batch of records as NDJSON lines or CSV rows"""
+    if export_format == ExportFormat.NDJSON:
+        return "".join(json.dumps(record) + "\n" for record in records)
+    return _csv(
+        ["|".join(record[field]) if field == "tags" else record[field] for field in fields]
+        for record in records
+    )
+
+
+async def _stream(stmt: Select, to_record, fields: Tuple[str, ...], export_format: ExportFormat, scalars: bool) -> AsyncIterator[str]:
+    """Stream a query batch by batch from a server-side cursor"""
+    if export_format == ExportFormat.CSV:
+        yield _csv([fields])
+
+    # The request-scoped session may be closed before the body is sent
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if scalars:
+            result = result.scalars()
+        async for batch in result.partitions():
+            # The identity map holds rows weakly, so finished batches are freed
+            yield _encode((to_record(row) for row in batch), fields, export_format)
+
+
+def _response(body: AsyncIterator[str], name: str, export_format: ExportFormat) -> StreamingResponse:
+    if export_format == ExportFormat.NDJSON:
+        media_type = "application/x-ndjson"
+    else:
+        media_type = "text/csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'},
+    )
+
+
+@router.get("/blogs")
+async def export_blogs(
+    format: ExportFormat = ExportFormat.NDJSON,
+    admin_user: TokenData = Depends(require_admin)
+):
+    """Stream every blog as NDJSON or CSV (Admin only)"""
+    stmt = blog_query().order_by(Blog.id)
+    body = _stream(stmt, _blog_record, BLOG_FIELDS, format, scalars=True)
+    return _response(body, "blogs", format)
+
+
+@router.get("/users")
+async def export_users(
+    format: ExportFormat = ExportFormat.NDJSON,
+    admin_user: TokenData = Depends(require_admin)
+):
+    """Stream every user as NDJSON or CSV (Admin only)"""
+    stmt = select(*user_columns()).order_by(User.id)
+    body = _stream(stmt, _user_record, USER_FIELDS, format, scalars=False)
+    return _response(body, "users", format)
@@ -1,16 +1,50 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, UserRole,Blog, Category, Tag
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.blog_counts import count_blogs
+from app.database import get_async_db
+from app.models import User, UserRole,Blog
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_ranked_page, fetch_row_page
+from app.queries import (
+    BLOG_FIELDS,
+    BLOG_FIELDS_QUERY,
+    BLOG_TABLES,
+    USER_FIELDS,
+    USER_FIELDS_QUERY,
+    blog_rows_query,
+    blog_search_query,
+    filter_blogs,
+    insert_blog,
+    load_row_tags,
+    parse_fields,
+    user_columns,
+)
 from app.schemas import (
     UserResponse,
+    UserPage,
     UserUpdate,
     UserUpdateAdmin,
     MessageResponse,
-    BlogCreate, BlogResponse
+    BlogCreate, BlogResponse, BlogPage,
+    TagMatch,
+    TokenData
+)
+from app.reference_data import resolve_blog_references
+from app.serialization import blog_from_insert, blog_page_response, blog_response, user_page_response, user_response
+from app.user_role import (
+    hash_password,
+    get_current_user,
+    get_current_reader,
+    get_current_principal,
+    get_read_db,
+    require_admin,
+    invalidate_user,
+    revoke_tokens,
 )
-from app.user_role import hash_password, get_current_user, require_admin
+from app.versions import bump_versions, check_not_modified
 
 router = APIRouter(prefix="/users", tags=["Users Blogs"])
 
@@ -18,61 +52,170 @@ router = APIRouter(prefix="/users", tags=["Users Blogs"])
 
 
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_user)):
+async def get_my_profile(fields: Optional[str] = USER_FIELDS_QUERY, current_user: User = Depends(get_current_reader)):
     """Get current user's profile"""
-    return current_user
+    # Already loaded (or cached) by authentication, so only the output is trimmed
+    return user_response(current_user, parse_fields(fields, USER_FIELDS))
 
 
 @router.put("/me", response_model=UserResponse)
-def update_my_profile(
+async def update_my_profile(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile (cannot change role)"""
+    previous_email = current_user.email
+
     # Check if new email is already taken
     if user_data.email and user_data.email != current_user.email:
-        if db.query(User).filter(User.email == user_data.email).first():
+        if await db.scalar(select(User).where(User.email == user_data.email)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         current_user.email = user_data.email
+        revoke_tokens(current_user)
     
     if user_data.full_name is not None:
         current_user.full_name = user_data.full_name
     
     if user_data.password:
-        current_user.hashed_password = hash_password(user_data.password)
+        current_user.hashed_password = await hash_password(user_data.password)
+        revoke_tokens(current_user)
     
     # Users cannot change their own is_active status or role
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    invalidate_user(previous_email, current_user.id)
     return current_user
 
 
+# Blog routes are declared before "/{user_id}" so that it does not capture "/users/blogs"
+
+# List all blogs
+
+@router.get("/blogs", response_model=BlogPage)
+async def list_blogs(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category_id: Optional[int] = None,
+    tag_ids: Optional[List[int]] = Query(None),
+    tag_match: TagMatch = TagMatch.ANY,
+    author: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = BLOG_FIELDS_QUERY,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenData = Depends(get_current_principal)
+):
+    """List blogs with category and tags, one page at a time, optionally filtered"""
+    fields = parse_fields(fields, BLOG_FIELDS)
+    not_modified = await check_not_modified(request, response, db, *BLOG_TABLES)
+    if not_modified:
+        return not_modified
+    stmt = filter_blogs(
+        blog_rows_query(fields),
+        category_id=category_id,
+        tag_ids=tag_ids,
+        match_all_tags=tag_match == TagMatch.ALL,
+        author=author,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    page = await fetch_row_page(db, stmt, Blog, cursor, limit)
+    tags = await load_row_tags(db, page["items"], fields)
+    return blog_page_response(page, tags, fields, headers=response.headers)
+
+# Full-text search over title and author
+
+@router.get("/blogs/search", response_model=BlogPage)
+async def search_blogs(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = BLOG_FIELDS_QUERY,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenData = Depends(get_current_principal)
+):
+    """Search blogs by title and author, best matches first"""
+    fields = parse_fields(fields, BLOG_FIELDS)
+    if not q.split():
+        return {"items": [], "next_cursor": None}
+    stmt, rank = blog_search_query(db.get_bind().dialect.name, q, blog_rows_query(fields))
+    page = await fetch_ranked_page(db, stmt, rank, Blog, cursor, limit)
+    tags = await load_row_tags(db, page["items"], fields)
+    return blog_page_response(page, tags, fields)
+
+# Get single blog by ID
+
+@router.get("/blogs/{blog_id}", response_model=BlogResponse)
+async def get_blog(blog_id: int, request: Request, response: Response, fields: Optional[str] = BLOG_FIELDS_QUERY, db: AsyncSession = Depends(get_read_db), current_user: TokenData = Depends(get_current_principal)):
+    fields = parse_fields(fields, BLOG_FIELDS)
+    not_modified = await check_not_modified(request, response, db, *BLOG_TABLES)
+    if not_modified:
+        return not_modified
+    row = (await db.execute(blog_rows_query(fields).where(Blog.id == blog_id))).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    tags = await load_row_tags(db, [row], fields)
+    return blog_response(row, tags and tags[blog_id], fields, headers=response.headers)
+
+
+# Create blog (existing category + tags only)
+
+@router.post("/blogs", response_model=BlogResponse)
+async def create_blog(
+    blog: BlogCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)  # 🔐 only authenticated users
+):
+
+    author = current_user.full_name or current_user.email
+    category_name, tags = await resolve_blog_references(db, blog.category_id, blog.tag_ids)
+    tag_ids = [tag_id for tag_id, _ in tags]
+    try:
+        row = await insert_blog(db, blog.title, author, blog.category_id, tag_ids)
+        await count_blogs(db, [(blog.category_id, tag_ids)])
+        await bump_versions(db, "blogs")
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        # Deleted by another worker since our last version check: answer as a fresh lookup would
+        await resolve_blog_references(db, blog.category_id, blog.tag_ids, refresh=True)
+        raise
+
+    return blog_from_insert(row, blog.title, author, blog.category_id, category_name, tags)
+
+
 # ==================== ADMIN ROUTES ====================
 
-@router.get("/", response_model=List[UserResponse])
-def list_all_users(
-    skip: int = 0,
-    limit: int = 100,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+@router.get("/", response_model=UserPage)
+async def list_all_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = USER_FIELDS_QUERY,
+    admin_user: TokenData = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all users (Admin only)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    """List users, one page at a time (Admin only)"""
+    fields = parse_fields(fields, USER_FIELDS)
+    page = await fetch_row_page(db, select(*user_columns(fields)), User, cursor, limit)
+    return user_page_response(page, fields)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user_by_id(
+async def get_user_by_id(
     user_id: int,
+    fields: Optional[str] = USER_FIELDS_QUERY,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific user by ID (User can only see their own, Admin can see all)"""
+    fields = parse_fields(fields, USER_FIELDS)
     # Regular users can only see their own profile
     if current_user.role != UserRole.ADMIN and current_user.id != user_id:
         raise HTTPException(
@@ -80,64 +223,72 @@ def get_user_by_id(
             detail="Not authorized to view this user"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(*user_columns(fields)).where(User.id == user_id))).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user
+    return user_response(user, fields)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user_admin(
+async def update_user_admin(
     user_id: int,
     user_data: UserUpdateAdmin,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin_user: TokenData = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update any user (Admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    previous_email = user.email
     
     # Check if new email is already taken
     if user_data.email and user_data.email != user.email:
-        if db.query(User).filter(User.email == user_data.email).first():
+        if await db.scalar(select(User).where(User.email == user_data.email)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         user.email = user_data.email
+        revoke_tokens(user)
     
     if user_data.full_name is not None:
         user.full_name = user_data.full_name
     
     if user_data.password:
-        user.hashed_password = hash_password(user_data.password)
+        user.hashed_password = await hash_password(user_data.password)
+        revoke_tokens(user)
     
     if user_data.is_active is not None:
+        if user.is_active and not user_data.is_active:
+            revoke_tokens(user)
         user.is_active = user_data.is_active
     
     if user_data.role is not None:
+        if user_data.role != user.role:
+            revoke_tokens(user)
         user.role = user_data.role
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_user(previous_email, user.id)
     return user
 
 
 @router.delete("/{user_id}", response_model=MessageResponse)
-def delete_user(
+async def delete_user(
     user_id: int,
-    admin_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin_user: TokenData = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Soft delete a user - sets is_active to False (Admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,61 +304,7 @@ def delete_user(
     
     # Soft delete - set is_active to False
     user.is_active = False
-    db.commit()
+    revoke_tokens(user)
+    await db.commit()
+    invalidate_user(user.email, user.id)
     return {"message": f"User {user.email} has been deactivated"}
-
-
-
-# List all blogs
-
-@router.get("/blogs", response_model=List[BlogResponse])
-def list_blogs(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """List all blogs with category and tags"""
-    return db.query(Blog).all()
-
-# Get single blog by ID
-
-@router.get("/blogs/{blog_id}", response_model=BlogResponse)
-def get_blog(blog_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    blog = db.query(Blog).get(blog_id)
-    if not blog:
-        raise HTTPException(status_code=404, detail="Blog not found")
-    return blog
-
-
-# Create blog (existing category + tags only)
-
-@router.post("/blogs", response_model=BlogResponse)
-def create_blog(
-    blog: BlogCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # 🔐 only authenticated users
-):
-
-    category = db.query(Category).get(blog.category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-
-
-    tags = []
-    if blog.tag_ids:
-        tags = db.query(Tag).filter(Tag.id.in_(blog.tag_ids)).all()
-        # Ensure all requested tags exist
-        if len(tags) != len(blog.tag_ids):
-            raise HTTPException(status_code=400, detail="One or more tags not found")
-
-   
-    new_blog = Blog(
-        title=blog.title,
-        author=current_user.full_name or current_user.email,
-        category=category
-    )
-    
-    new_blog.tags = tags
-
-  
-    db.add(new_blog)
-    db.commit()
-    db.refresh(new_blog)
-
-    return new_blog
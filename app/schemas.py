@@ -1,16 +1,24 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional,List
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Any, Dict, Literal, Optional, List, Union
+from typing_extensions import Annotated
 from datetime import datetime
-from app.models import UserRole
+from app.models import JobStatus, UserRole
+import enum
 
 
 # Token Schemas
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
+    id: Optional[int] = None
     email: Optional[str] = None
     role: Optional[str] = None
 
@@ -53,6 +61,11 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -83,6 +96,15 @@ class CategoryResponse(CategoryBase):
     class Config:
         from_attributes = True
 
+
+class CategoryListResponse(CategoryResponse):
+    # Only present with with_counts=1
+    blog_count: Optional[int] = None
+
+class NameBulkUpsert(BaseModel):
+    names: List[Annotated[str, Field(max_length=100)]]
+
+
 class TagBase(BaseModel):
     name: str = Field(..., max_length=100)
 
@@ -102,6 +124,10 @@ class TagResponse(TagBase):
         from_attributes = True
 
 
+class TagCountResponse(TagResponse):
+    blog_count: int
+
+
 
 #Blog Schemas
 class BlogBase(BaseModel):
@@ -132,3 +158,83 @@ class BlogResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BlogPage(BaseModel):
+    items: List[BlogResponse]
+    next_cursor: Optional[str] = None
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkBlogResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class TagMatch(str, enum.Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+# Export Schemas
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+# Job Schemas
+class DeactivateUsersJob(BaseModel):
+    kind: Literal["deactivate_users"]
+    user_ids: Optional[List[int]] = Field(None, max_length=10000)
+    # Every user whose email ends with "@<email_domain>" (case-insensitive)
+    email_domain: Optional[str] = Field(None, max_length=255, pattern=r"^[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)*$")
+
+    @model_validator(mode="after")
+    def require_filter(self):
+        if not self.user_ids and not self.email_domain:
+            raise ValueError("user_ids or email_domain is required")
+        return self
+
+
+class DeleteCategoryJob(BaseModel):
+    kind: Literal["delete_category"]
+    category_id: int
+
+
+class RehashPasswordsJob(BaseModel):
+    kind: Literal["rehash_passwords"]
+
+
+class PruneRefreshTokensJob(BaseModel):
+    kind: Literal["prune_refresh_tokens"]
+
+
+JobCreate = Annotated[
+    Union[DeactivateUsersJob, DeleteCategoryJob, RehashPasswordsJob, PruneRefreshTokensJob],
+    Field(discriminator="kind"),
+]
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    params: Dict[str, Any]
+    status: JobStatus
+    processed: int
+    total: Optional[int] = None
+    checkpoint: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
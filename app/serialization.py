@@ -0,0 +1,91 @@
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from fastapi import Response
+from pydantic_core import to_json
+from sqlalchemy.engine import Row
+
+from app.queries import BLOG_FIELDS, USER_FIELDS
+
+# Fast path for read responses: rows are trusted database values, so they are
+# shaped into plain dicts matching BlogResponse/UserResponse field for field
+# and dumped straight to JSON bytes by pydantic-core, which encodes datetimes
+# and enums exactly as response_model serialization does. Returning a
+# Response makes FastAPI skip its validate-then-serialize pass on the result.
+# With ?fields= the dicts carry only the requested keys.
+
+
+class RawJSONResponse(Response):
+    """Response whose content is already serialized JSON"""
+
+    media_type = "application/json"
+
+
+_BLOG_VALUES = {
+    "id": lambda row, tags: row.id,
+    "title": lambda row, tags: row.title,
+    "author": lambda row, tags: row.author,
+    "category": lambda row, tags: {"name": row.category_name, "id": row.category_id},
+    "tags": lambda row, tags: [{"name": name, "id": tag_id} for tag_id, name in tags],
+    "created_at": lambda row, tags: row.created_at,
+    "updated_at": lambda row, tags: row.updated_at,
+}
+
+
+def blog_from_row(row: Row, tags: List[tuple], fields: Tuple[str, ...] = BLOG_FIELDS) -> dict:
+    """BlogResponse-shaped dict from a blog_rows_query() row and its (id, name) tag pairs"""
+    if fields == BLOG_FIELDS:
+        return {
+            "id": row.id,
+            "title": row.title,
+            "author": row.author,
+            "category": {"name": row.category_name, "id": row.category_id},
+            "tags": [{"name": name, "id": tag_id} for tag_id, name in tags],
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+        }
+    return {field: _BLOG_VALUES[field](row, tags) for field in fields}
+
+
+def blog_from_insert(row: Row, title: str, author: str, category_id: int, category_name: str,
+                     tags: List[tuple]) -> dict:
+    """BlogResponse-shaped dict for a blog just written by insert_blog()"""
+    return {
+        "id": row.id,
+        "title": title,
+        "author": author,
+        "category": {"name": category_name, "id": category_id},
+        "tags": [{"name": name, "id": tag_id} for tag_id, name in tags],
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+def user_from_row(row, fields: Tuple[str, ...] = USER_FIELDS) -> dict:
+    """UserResponse-shaped dict from a user_columns() row or a User"""
+    return {field: getattr(row, field) for field in fields}
+
+
+def blog_response(row: Row, tags: Optional[List[tuple]], fields: Tuple[str, ...] = BLOG_FIELDS,
+                  headers: Optional[Mapping[str, str]] = None) -> RawJSONResponse:
+    """Serialize a single blog row as a BlogResponse"""
+    return RawJSONResponse(to_json(blog_from_row(row, tags or [], fields)), headers=headers)
+
+
+def user_response(row, fields: Tuple[str, ...] = USER_FIELDS) -> RawJSONResponse:
+    """Serialize a single user row (or User) as a UserResponse"""
+    return RawJSONResponse(to_json(user_from_row(row, fields)))
+
+
+def blog_page_response(page: dict, tags: Optional[Dict[int, List[tuple]]], fields: Tuple[str, ...] = BLOG_FIELDS,
+                       headers: Optional[Mapping[str, str]] = None) -> RawJSONResponse:
+    """Serialize a fetch_row_page() result of blog rows as a BlogPage"""
+    tags = tags or {}
+    items = [blog_from_row(row, tags.get(row.id, ()), fields) for row in page["items"]]
+    return RawJSONResponse(to_json({"items": items, "next_cursor": page["next_cursor"]}), headers=headers)
+
+
+def user_page_response(page: dict, fields: Tuple[str, ...] = USER_FIELDS,
+                       headers: Optional[Mapping[str, str]] = None) -> RawJSONResponse:
+    """Serialize a fetch_row_page() result of user rows as a UserPage"""
+    items = [user_from_row(row, fields) for row in page["items"]]
+    return RawJSONResponse(to_json({"items": items, "next_cursor": page["next_cursor"]}), headers=headers)
@@ -1,64 +1,226 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 import hashlib
+import secrets
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.cache import TTLCache
 from app.config import settings
-from app.database import get_db
-from app.models import User, UserRole
+from app.database import get_async_db, read_session
+from app.hashing import password_hasher
+from app.models import RefreshToken, User, UserRole
+from app.schemas import TokenData
 
 # API Key header for token
 api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 
+# Column snapshots of authenticated users, keyed by token subject (email)
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
 
-def hash_password(password: str) -> str:
-    """Hash a password using SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+# (token_version, is_active) keyed by user id, used by stateless verification
+token_versions = TTLCache(
+    max_size=settings.TOKEN_VERSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return hash_password(plain_password) == hashed_password
+async def hash_password(password: str) -> str:
+    """Hash a password in the hashing process pool"""
+    return await password_hasher.hash(password)
 
 
-def create_access_token(email: str, role: str) -> str:
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; the second item is a new hash when the stored one is outdated"""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
+
+
+def create_access_token(email: str, role: str, user_id: Optional[int] = None, token_version: int = 0) -> str:
     """Create a JWT access token"""
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     data = {"sub": email, "role": role, "exp": expire}
+    if user_id is not None:
+        data["uid"] = user_id
+        data["ver"] = token_version
     return jwt.encode(data, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-async def get_current_user(
-    auth_header: str = Depends(api_key_header),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def revoke_tokens(user: User) -> None:
+    """Invalidate every token issued to a user so far (takes effect on commit)"""
+    user.token_version = (user.token_version or 0) + 1
+
+
+def hash_refresh_token(token: str) -> str:
+    """Digest under which a refresh token is stored (tokens are random, so SHA-256 suffices)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_refresh_token(db: AsyncSession, user: User, family_id: Optional[str] = None) -> str:
+    """Issue a refresh token for a user, starting a new family unless one is given; the caller commits"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        token_version=user.token_version,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+def stale_refresh_tokens():
+    """Refresh token rows that are no longer needed: expired, or used before the reuse window"""
+    now = datetime.now(timezone.utc)
+    return or_(
+        RefreshToken.expires_at <= now,
+        RefreshToken.used_at < now - timedelta(hours=settings.REFRESH_TOKEN_REUSE_WINDOW_HOURS),
+    )
+
+
+async def prune_refresh_tokens(db: AsyncSession, *conditions) -> None:
+    """Delete stale refresh token rows matching conditions (a user or family); the caller commits"""
+    # No need to sync the session: the rotated token object is not used after this
+    await db.execute(
+        delete(RefreshToken).where(stale_refresh_tokens(), *conditions),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def _snapshot_user(user: User) -> dict:
+    """Copy the column values of a user so they can outlive the session"""
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+async def _user_from_snapshot(snapshot: dict, db: AsyncSession) -> User:
+    """Attach a cached user to the request session without querying"""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+def invalidate_user(email: str, user_id: Optional[int] = None) -> None:
+    """Evict a user from the auth caches after it has been changed"""
+    principal_cache.invalidate(email)
+    if user_id is not None:
+        token_versions.invalidate(user_id)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or missing token"
     )
-    
+
+
+def _decode_token(auth_header: Optional[str]) -> dict:
+    """Decode the bearer token from the Authorization header"""
     if not auth_header:
-        raise credentials_exception
+        raise _credentials_exception()
     
     token = auth_header.replace("Bearer ", "") if auth_header.startswith("Bearer ") else auth_header
     
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if not email:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not user.is_active:
-        raise credentials_exception
+        raise _credentials_exception()
+    if not payload.get("sub"):
+        raise _credentials_exception()
+    return payload
+
+
+async def _load_user(payload: dict, db: AsyncSession, cache: bool = True) -> User:
+    """Resolve the token subject to an active user, via the principal cache
+
+    Pass cache=False when db may be a replica: a lagging row must never be
+    cached for the primary paths to trust.
+    """
+    email = payload["sub"]
+    snapshot = principal_cache.get(email)
+    if snapshot is not None:
+        user = await _user_from_snapshot(snapshot, db)
+    else:
+        user = await db.scalar(select(User).where(User.email == email))
+        if not user or not user.is_active:
+            raise _credentials_exception()
+        if cache:
+            principal_cache.set(email, _snapshot_user(user))
+
+    version = payload.get("ver")
+    if version is not None and version != user.token_version:
+        raise _credentials_exception()
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def _current_token_version(user_id: int, db: AsyncSession) -> Optional[int]:
+    """Current token_version of an active user, or None if it cannot log in"""
+    entry = token_versions.get(user_id)
+    if entry is None:
+        result = await db.execute(
+            select(User.token_version, User.is_active).where(User.id == user_id)
+        )
+        row = result.first()
+        entry = (row.token_version, row.is_active) if row else (None, False)
+        token_versions.set(user_id, entry)
+    version, is_active = entry
+    return version if is_active else None
+
+
+async def get_token_payload(auth_header: str = Depends(api_key_header)) -> dict:
+    """Decoded bearer token, shared by the auth and read-session dependencies of a request"""
+    return _decode_token(auth_header)
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user from JWT token"""
+    user = await _load_user(payload, db)
+    # A commit on this session starts the user's read-your-writes window
+    db.info["user_id"] = user.id
+    return user
+
+
+async def get_current_principal(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> TokenData:
+    """Get id, email and role of the caller without loading the full user row in stateless mode"""
+    user_id = payload.get("uid")
+    version = payload.get("ver")
+
+    if settings.STATELESS_AUTH and user_id is not None and version is not None:
+        if await _current_token_version(user_id, db) != version:
+            raise _credentials_exception()
+        db.info["user_id"] = user_id
+        return TokenData(id=user_id, email=payload["sub"], role=payload.get("role"))
+
+    user = await _load_user(payload, db)
+    db.info["user_id"] = user.id
+    return TokenData(id=user.id, email=user.email, role=user.role.value)
+
+
+async def get_read_db(payload: dict = Depends(get_token_payload)):
+    """Read-only session on a replica; the caller's own recent writes keep it on the primary"""
+    async with read_session(payload.get("uid")) as db:
+        yield db
+
+
+async def get_current_reader(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """Like get_current_user, but loaded through the read session; not for updates"""
+    return await _load_user(payload, db, cache=False)
+
+
+async def require_admin(current_user: TokenData = Depends(get_current_principal)) -> TokenData:
     """Require admin role"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
@@ -0,0 +1,65 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models import TableVersion
+
+
+async def bump_versions(db: AsyncSession, *tables: str) -> None:
+    """Record a change to the given tables; committed with the caller's transaction"""
+    insert_ = dialect_insert(db)
+    for table in tables:
+        stmt = insert_(TableVersion).values(table_name=table, version=1)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"version": TableVersion.version + 1},
+        ))
+
+
+async def get_versions(db: AsyncSession, *tables: str) -> Dict[str, int]:
+    """Current version of each table (0 if it was never written)"""
+    result = await db.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+    )
+    versions = dict.fromkeys(tables, 0)
+    versions.update({row.table_name: row.version for row in result})
+    return versions
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    *tables: str,
+    versions: Optional[Dict[str, int]] = None,
+) -> Optional[Response]:
+    """Conditional GET: return a 304 if If-None-Match still matches, else set the ETag
+
+    The weak ETag combines the versions of every table the response reads
+    and the query string, so it is checked before the real query runs.
+    Responses built from cached data pass the versions that data was loaded at.
+    """
+    if versions is None:
+        versions = await get_versions(db, *tables)
+    key = "|".join(f"{table}:{versions[table]}" for table in tables)
+    key += "|" + request.url.path + "?" + request.url.query
+    etag = 'W/"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,44 @@
+"""Compare two benchmark result files written by benchmarks.run
+
+    python -m benchmarks.compare before.json after.json
+"""
+import json
+import sys
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(before, after) -> str:
+    if before in (None, 0) or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 2
+    with open(argv[0]) as f:
+        before = json.load(f)
+    with open(argv[1]) as f:
+        after = json.load(f)
+
+    print(f"{before['meta']['git_revision']} -> {after['meta']['git_revision']}")
+    for key in ("database", "volumes", "concurrency", "requests_per_scenario"):
+        if before["meta"].get(key) != after["meta"].get(key):
+            print(f"warning: {key} differs ({before['meta'].get(key)} vs {after['meta'].get(key)})")
+
+    print(f"{'scenario':16}" + "".join(f"{metric:>28}" for metric in METRICS))
+    for name in sorted(set(before["scenarios"]) | set(after["scenarios"])):
+        old, new = before["scenarios"].get(name, {}), after["scenarios"].get(name, {})
+        cells = [
+            f"{old.get(metric)} -> {new.get(metric)} ({_change(old.get(metric), new.get(metric))})"
+            for metric in METRICS
+        ]
+        print(f"{name:16}" + "".join(f"{cell:>28}" for cell in cells))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
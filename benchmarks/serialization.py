@@ -0,0 +1,135 @@
+"""Compare response serialization paths for a page of blogs or users
+
+    python -m benchmarks.serialization --items 1000 --output serialization.json
+
+No database is involved: the ORM variants serialize transient Blog/User
+entities, the row variant (app.serialization) the equivalent column tuples.
+The row variant must produce the same bytes as the response_model path.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DOCKER_URL", "sqlite://")
+os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmark-password")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy.engine.result import result_tuple  # noqa: E402
+
+from app.models import Blog, Category, Tag, User, UserRole  # noqa: E402
+from app.queries import blog_columns, user_columns  # noqa: E402
+from app.schemas import BlogPage, UserPage  # noqa: E402
+from app.serialization import blog_page_response, user_page_response  # noqa: E402
+
+try:
+    import orjson
+except ImportError:  # optional, only adds one more variant
+    orjson = None
+
+
+def _fixtures(count: int) -> Dict[str, object]:
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    categories = [Category(id=i, name=f"category-{i}") for i in range(1, 21)]
+    tags = [Tag(id=i, name=f"tag-{i}") for i in range(1, 101)]
+    blogs, blog_rows, blog_tags = [], [], {}
+    for i in range(1, count + 1):
+        category = categories[i % len(categories)]
+        blog_tag_list = [tags[(i * 7 + k) % len(tags)] for k in range(3)]
+        created_at = epoch + timedelta(seconds=i)
+        blogs.append(Blog(
+            id=i, title=f"Post {i}", author=f"Author {i % 50}",
+            category=category, tags=blog_tag_list, created_at=created_at, updated_at=None,
+        ))
+        blog_rows.append((i, created_at, f"Post {i}", f"Author {i % 50}", category.id, category.name, None))
+        blog_tags[i] = [(tag.id, tag.name) for tag in blog_tag_list]
+
+    users, user_rows = [], []
+    for i in range(1, count + 1):
+        values = (i, epoch + timedelta(seconds=i), f"user{i}@example.com", f"User {i}", UserRole.USER, True, None)
+        users.append(User(**dict(zip((c.key for c in user_columns()), values))))
+        user_rows.append(values)
+
+    # Real Row objects, as the database would return them
+    blog_rows = _rows(blog_columns(), blog_rows)
+    user_rows = _rows(user_columns(), user_rows)
+    return {
+        "blogs": blogs, "blog_rows": blog_rows, "blog_tags": blog_tags,
+        "users": users, "user_rows": user_rows,
+    }
+
+
+def _rows(columns, values):
+    make_row = result_tuple([column.key for column in columns])
+    return [make_row(value) for value in values]
+
+
+def _variants(data: Dict[str, object]) -> Dict[str, Callable[[], bytes]]:
+    blog_page, user_page = TypeAdapter(BlogPage), TypeAdapter(UserPage)
+    blogs = {"items": data["blogs"], "next_cursor": None}
+    users = {"items": data["users"], "next_cursor": None}
+
+    variants = {
+        # What FastAPI does with response_model: validate from attributes, then dump
+        "blogs/orm_validate_dump": lambda: blog_page.dump_json(blog_page.validate_python(blogs, from_attributes=True)),
+        # Older FastAPI / custom response classes: dict + jsonable_encoder + json
+        "blogs/orm_jsonable_encoder": lambda: json.dumps(
+            jsonable_encoder(blog_page.validate_python(blogs, from_attributes=True))).encode(),
+        "blogs/rows_to_json": lambda: blog_page_response(
+            {"items": data["blog_rows"], "next_cursor": None}, data["blog_tags"]).body,
+        "users/orm_validate_dump": lambda: user_page.dump_json(user_page.validate_python(users, from_attributes=True)),
+        "users/orm_jsonable_encoder": lambda: json.dumps(
+            jsonable_encoder(user_page.validate_python(users, from_attributes=True))).encode(),
+        "users/rows_to_json": lambda: user_page_response(
+            {"items": data["user_rows"], "next_cursor": None}).body,
+    }
+    if orjson is not None:
+        variants["blogs/orm_orjson"] = lambda: orjson.dumps(
+            blog_page.dump_python(blog_page.validate_python(blogs, from_attributes=True)))
+        variants["users/orm_orjson"] = lambda: orjson.dumps(
+            user_page.dump_python(user_page.validate_python(users, from_attributes=True)))
+    return variants
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    variants = _variants(_fixtures(args.items))
+    for resource in ("blogs", "users"):
+        if variants[f"{resource}/rows_to_json"]() != variants[f"{resource}/orm_validate_dump"]():
+            raise SystemExit(f"{resource}: row serialization differs from the response_model output")
+
+    results = {}
+    for name, run in sorted(variants.items()):
+        run()  # warm up
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            body = run()
+            timings.append(time.perf_counter() - started)
+        results[name] = {
+            "median_ms": round(statistics.median(timings) * 1000, 3),
+            "min_ms": round(min(timings) * 1000, 3),
+            "bytes": len(body),
+        }
+        print(f"{name:28} median {results[name]['median_ms']:>8} ms  min {results[name]['min_ms']:>8} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"items": args.items, "repeat": args.repeat, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
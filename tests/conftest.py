@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+# Settings are read when app is imported: point them at a throwaway SQLite file
+_db_path = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.update(
+    SECRET_KEY="test-secret",
+    DATABASE_URL=f"sqlite:///{_db_path}",
+    DOCKER_URL=f"sqlite:///{_db_path}",
+    ADMIN_EMAIL="admin@example.com",
+    ADMIN_PASSWORD="admin-password",
+    RATE_LIMIT_ENABLED="false",
+    # No background job polling between the statements tests count
+    JOB_WORKERS="0",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
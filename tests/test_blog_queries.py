@@ -0,0 +1,59 @@
+"""Blog list endpoints must issue the same number of SQL statements whatever the page size
+
+    python -m pytest tests
+"""
+import pytest
+from sqlalchemy import event
+
+from app.database import async_engine
+
+BLOG_COUNT = 20
+
+
+@pytest.fixture(scope="module")
+def admin_headers(client):
+    response = client.post("/auth/login", json={"email": "admin@example.com", "password": "admin-password"})
+    response.raise_for_status()
+    headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+
+    category_id = client.post("/admin/categories", json={"name": "news"}, headers=headers).json()["id"]
+    tag_ids = [client.post("/admin/tags", json={"name": f"tag-{i}"}, headers=headers).json()["id"] for i in range(3)]
+    for i in range(BLOG_COUNT):
+        response = client.post("/admin/blogs", json={
+            "title": f"Post {i}",
+            "author": "Admin",
+            "category_id": category_id,
+            "tag_ids": tag_ids[:i % 3 + 1],
+        }, headers=headers)
+        response.raise_for_status()
+    return headers
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.parametrize("path", ["/users/blogs", "/admin/blogs"])
+def test_statement_count_independent_of_page_size(client, admin_headers, statements, path):
+    # Warm the per-worker caches (principal, token versions) first
+    client.get(path, params={"limit": 1}, headers=admin_headers).raise_for_status()
+
+    counts = {}
+    for limit in (1, BLOG_COUNT):
+        statements.clear()
+        response = client.get(path, params={"limit": limit}, headers=admin_headers)
+        response.raise_for_status()
+        items = response.json()["items"]
+        assert len(items) == limit
+        assert all(item["category"]["name"] == "news" and item["tags"] for item in items)
+        counts[limit] = len(statements)
+
+    assert counts[1] == counts[BLOG_COUNT], statements
@@ -0,0 +1,37 @@
+"""The SQLite full-text index must follow the blogs table through drop_all/create_all"""
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Blog, Category
+from app.queries import blog_search_query
+
+
+def _seed(engine, titles):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.execute(insert(Category), [{"name": "news"}])
+        db.execute(insert(Blog), [{"title": title, "author": "someone", "category_id": 1} for title in titles])
+        db.commit()
+
+
+def _search(engine, q):
+    stmt, rank = blog_search_query("sqlite", q, select(Blog.id, Blog.title))
+    with Session(engine) as db:
+        return db.execute(stmt.order_by(rank.desc(), Blog.id)).all()
+
+
+def test_reseed_rebuilds_search_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    _seed(engine, [f"python post {i}" for i in range(10)])
+    assert len(_search(engine, "python")) == 10
+
+    # Reseed: rowids 1..5 are reused by different blogs, only one about python
+    _seed(engine, ["sql", "async", "python caching", "indexes", "sql again"])
+
+    assert [(row.id, row.title) for row in _search(engine, "python")] == [(3, "python caching")]
+    with engine.connect() as conn:
+        assert conn.scalar(text("SELECT count(*) FROM blogs_fts_docsize")) == 5
+        assert conn.scalar(select(func.count()).select_from(Blog)) == 5
+    engine.dispose()
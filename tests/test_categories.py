@@ -0,0 +1,18 @@
+"""The category list documents the blog_count that with_counts=1 adds"""
+
+
+def test_category_list_schema_matches_both_shapes(client):
+    response = client.post("/auth/login", json={"email": "admin@example.com", "password": "admin-password"})
+    headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+    client.post("/admin/categories", json={"name": "counted"}, headers=headers).raise_for_status()
+
+    schema = client.get("/openapi.json").json()
+    ref = schema["paths"]["/admin/categories"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["items"]["$ref"]
+    fields = set(schema["components"]["schemas"][ref.rsplit("/", 1)[-1]]["properties"])
+    assert fields == {"name", "id", "blog_count"}
+
+    plain = client.get("/admin/categories", headers=headers).json()
+    counted = client.get("/admin/categories", params={"with_counts": 1}, headers=headers).json()
+    assert all(set(item) == {"name", "id"} for item in plain)
+    assert all(set(item) == fields for item in counted)
+    assert {item["id"] for item in plain} == {item["id"] for item in counted}
@@ -0,0 +1,14 @@
+"""An unknown email must cost the same password verification as a wrong password"""
+from app.hashing import password_hasher
+
+
+def _verifications(client, email):
+    before = password_hasher.stats()["samples"]
+    response = client.post("/auth/login", json={"email": email, "password": "wrong-password"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect email or password"
+    return password_hasher.stats()["samples"] - before
+
+
+def test_unknown_email_verifies_a_dummy_hash(client):
+    assert _verifications(client, "nobody@example.com") == _verifications(client, "admin@example.com") == 1
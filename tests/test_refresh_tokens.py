@@ -0,0 +1,84 @@
+"""Expired and long-used refresh token rows are pruned instead of piling up"""
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.jobs import JOB_KINDS
+from app.models import RefreshToken, User
+
+EMAIL = "rotator@example.com"
+PASSWORD = "rotator-password"
+
+
+def _run(client, query):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            result = await query(db)
+            await db.commit()
+            return result
+    return client.portal.call(run)
+
+
+def _add_token(client, user_id, family_id, expires_in, used_ago=None):
+    now = datetime.now(timezone.utc)
+    values = {
+        "user_id": user_id,
+        "token_hash": secrets.token_hex(32),
+        "family_id": family_id,
+        "token_version": 0,
+        "expires_at": now + expires_in,
+        "used_at": now - used_ago if used_ago is not None else None,
+    }
+    return _run(client, lambda db: db.scalar(insert(RefreshToken).values(**values).returning(RefreshToken.id)))
+
+
+def _token_ids(client, user_id):
+    return set(_run(client, lambda db: db.scalars(
+        select(RefreshToken.id).where(RefreshToken.user_id == user_id)
+    )).all())
+
+
+def test_login_refresh_and_job_prune_stale_rows(client):
+    client.post("/auth/register", json={"email": EMAIL, "password": PASSWORD}).raise_for_status()
+    login = client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD}).json()
+    user_id = _run(client, lambda db: db.scalar(select(User.id).where(User.email == EMAIL)))
+    family_id = _run(client, lambda db: db.scalar(
+        select(RefreshToken.family_id).where(RefreshToken.user_id == user_id)
+    ))
+
+    window = timedelta(hours=settings.REFRESH_TOKEN_REUSE_WINDOW_HOURS)
+    valid = timedelta(days=1)
+    long_used = _add_token(client, user_id, family_id, valid, used_ago=window + timedelta(hours=1))
+    recently_used = _add_token(client, user_id, family_id, valid, used_ago=timedelta(minutes=5))
+    other_family_expired = _add_token(client, user_id, "other-family", -timedelta(minutes=1))
+
+    # Rotation prunes the rotated family only
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    response.raise_for_status()
+    remaining = _token_ids(client, user_id)
+    assert long_used not in remaining
+    assert {recently_used, other_family_expired} <= remaining
+
+    # A used token still inside the reuse window keeps revoking its family
+    assert client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]}).status_code == 401
+
+    # Login prunes every stale row of the user
+    client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD}).raise_for_status()
+    remaining = _token_ids(client, user_id)
+    assert other_family_expired not in remaining
+    assert recently_used in remaining
+
+    # The job sweeps users who do not log in again
+    abandoned = _add_token(client, user_id, "abandoned", -timedelta(minutes=1))
+    kind = JOB_KINDS["prune_refresh_tokens"]
+    assert _run(client, lambda db: kind.count(db, {})) >= 1
+    checkpoint, pruned = {}, 0
+    while checkpoint is not None:
+        chunk = _run(client, lambda db: kind.step(db, {}, checkpoint, 100))
+        checkpoint, pruned = chunk.checkpoint, pruned + chunk.processed
+    assert pruned >= 1
+    assert abandoned not in _token_ids(client, user_id)
+    assert _run(client, lambda db: kind.count(db, {})) == 0